@@ -0,0 +1,170 @@
+"""
+Project: "2048 in Python!" - Batched NumPy engine
+
+Dependencies: 'numpy' module, installed via the terminal command 'python3 -m pip install numpy'
+
+Steps a whole batch of independent games at once for self-play and Monte Carlo workloads. The rules are the same as
+move()/slide() in Staff_Solution.py (including chain combinations) and place_random() (a 2, 4 or 8 with 60/37/3 odds).
+
+Boards are stored as an (B, N, N) integer array of the same pieces make_board uses (EMPTY is 0, 1 is a 2, 2 is a 4, ...)
+and boards[b][y][x] is the piece at (x,y) on board b, matching board[y][x] on a board from make_board.
+Directions are passed as an array of B integers indexing DIRECTIONS (0 = left, 1 = right, 2 = up, 3 = down).
+
+Abstraction Reference Guide:
+
+    to_array        - converts a list of boards made by make_board into an (B, N, N) exponent array
+    from_array      - converts an (B, N, N) exponent array back into a list of boards made by make_board
+    slide_lines     - slides every row of an (M, N) exponent array towards index 0 and returns (lines, scores)
+    slide_batch     - slides every board in the given direction and returns (boards, changed, scores)
+    spawn_batch     - places one random 2/4/8 on every selected board and returns (boards, xs, ys, exponents)
+    step_batch      - slides and spawns in one call, like play_move for a whole batch
+
+"""
+
+#Installed via 'python3 -m pip install numpy'
+import numpy
+
+from Staff_Solution import copy_board
+
+DIRECTIONS = ("left", "right", "up", "down");
+
+
+def to_array(boards):
+    #Returns an (B, N, N) exponent array holding the given boards (all boards must be the same size)
+    #Arg boards: list - boards made by make_board
+
+    return numpy.array(boards, dtype=numpy.int8).reshape(len(boards), len(boards[0]), len(boards[0]));
+
+
+def from_array(boards):
+    #Returns a list of boards (each with the same empty space counts make_board keeps) holding the given (B, N, N) array
+    #Arg boards: array - the exponent array to convert
+
+    return [copy_board(board) for board in boards.tolist()];
+
+
+def slide_lines(lines):
+    #Slides every row of the (M, N) exponent array towards index 0 following the rules of move()
+    #Returns a (lines, scores) tuple of the new (M, N) array and the (M,) score of every row
+    #Arg lines: array - the rows to slide
+
+    M, N = lines.shape;
+    everyone = numpy.arange(M);
+
+    #Each row is built up like a stack: pieces are pushed in order, and while the incoming piece matches the top
+    #of the stack they combine and the new piece keeps going (chain combinations) - exactly what move() does
+    stack = numpy.zeros((M, N), dtype=numpy.int64);
+    height = numpy.zeros(M, dtype=numpy.int64);
+    scores = numpy.zeros(M, dtype=numpy.int64);
+
+    for i in range(N):
+        incoming = lines[:, i].astype(numpy.int64);
+        active = incoming > 0;
+
+        #A piece can combine at most once per piece already on the stack
+        for chain in range(i):
+            top = stack[everyone, numpy.maximum(height - 1, 0)];
+            combine = active & (height > 0) & (top == incoming);
+            if not combine.any():
+                break;
+
+            height[combine] -= 1;
+            stack[combine, height[combine]] = 0;
+            incoming[combine] += 1;
+            scores[combine] += numpy.left_shift(1, incoming[combine]);
+
+        stack[everyone[active], height[active]] = incoming[active];
+        height[active] += 1;
+
+    return (stack.astype(lines.dtype), scores);
+
+
+def _orient(boards, direction):
+    #Turns the boards so that sliding in the given direction becomes sliding every row towards x = 0
+    if direction == 0:  return boards;
+    if direction == 1:  return boards[:, :, ::-1];
+    if direction == 2:  return boards.transpose(0, 2, 1);
+    return boards.transpose(0, 2, 1)[:, :, ::-1];
+
+
+def _unorient(boards, direction):
+    #Undoes _orient
+    if direction == 0:  return boards;
+    if direction == 1:  return boards[:, :, ::-1];
+    if direction == 2:  return boards.transpose(0, 2, 1);
+    return boards[:, :, ::-1].transpose(0, 2, 1);
+
+
+def slide_batch(boards, directions):
+    #Slides every board in its own direction without spawning anything
+    #Returns a (boards, changed, scores) tuple: the new (B, N, N) array, a (B,) array that is True where the board
+    #changed, and the (B,) score (total value of the pieces created by combinations) of every board
+    #Arg boards: array - (B, N, N) exponent array (not modified)
+    #Arg directions: array - (B,) integers indexing DIRECTIONS
+
+    B, N = boards.shape[0], boards.shape[1];
+    directions = numpy.asarray(directions);
+    assert directions.shape == (B,), "Need exactly one direction per board";
+    assert ((directions >= 0) & (directions < 4)).all(), "Invalid direction passed in";
+
+    result = numpy.empty_like(boards);
+    scores = numpy.zeros(B, dtype=numpy.int64);
+
+    for direction in range(4):
+        chosen = numpy.nonzero(directions == direction)[0];
+        if len(chosen) == 0:
+            continue;
+
+        lines = numpy.ascontiguousarray(_orient(boards[chosen], direction)).reshape(len(chosen) * N, N);
+        lines, line_scores = slide_lines(lines);
+
+        result[chosen] = _unorient(lines.reshape(len(chosen), N, N), direction);
+        scores[chosen] = line_scores.reshape(len(chosen), N).sum(axis=1);
+
+    changed = (result != boards).reshape(B, N * N).any(axis=1);
+    return (result, changed, scores);
+
+
+def spawn_batch(boards, selected, rng=None):
+    #Places a 2 (60%), 4 (37%) or 8 (3%) on a uniformly random empty space of every selected board that has one
+    #Returns a (boards, xs, ys, exponents) tuple - boards are changed in place and also returned, and the three
+    #(B,) arrays hold the spawn of every board (-1, -1, 0 where nothing was placed)
+    #Arg boards: array - (B, N, N) exponent array (modified in place)
+    #Arg selected: array - (B,) booleans, True for boards that should get a new piece
+    #Arg rng: numpy Generator (optional) - the random number generator to draw from
+
+    if rng is None:
+        rng = numpy.random.default_rng();
+
+    B, N = boards.shape[0], boards.shape[1];
+    flat = boards.reshape(B, N * N);
+    empty = flat == 0;
+    selected = numpy.asarray(selected) & empty.any(axis=1);
+
+    #Giving every empty space a random key and taking the largest picks one empty space uniformly per board
+    keys = rng.random((B, N * N));
+    keys[~empty] = -1;
+    cells = keys.argmax(axis=1);
+
+    generated = rng.random(B) * 100;
+    exponents = numpy.where(generated < 60, 1, numpy.where(generated < 97, 2, 3)).astype(boards.dtype);
+
+    chosen = numpy.nonzero(selected)[0];
+    boards[chosen, cells[chosen] // N, cells[chosen] % N] = exponents[chosen];
+
+    xs = numpy.where(selected, cells % N, -1);
+    ys = numpy.where(selected, cells // N, -1);
+    exponents = numpy.where(selected, exponents, 0);
+    return (boards, xs, ys, exponents);
+
+
+def step_batch(boards, directions, rng=None):
+    #Plays one full turn on every board: slides it and places a random piece if the slide changed anything
+    #Returns a (boards, changed, scores, xs, ys, exponents) tuple (see slide_batch and spawn_batch)
+    #Arg boards: array - (B, N, N) exponent array (not modified)
+    #Arg directions: array - (B,) integers indexing DIRECTIONS
+    #Arg rng: numpy Generator (optional) - the random number generator to draw from
+
+    boards, changed, scores = slide_batch(boards, directions);
+    boards, xs, ys, exponents = spawn_batch(boards, changed, rng);
+    return (boards, changed, scores, xs, ys, exponents);
@@ -0,0 +1,299 @@
+"""
+Project: "2048 in Python!" - Benchmarks
+
+Times the engine pieces against each other on random boards so changes to them can be measured.
+
+To Run: python3 Benchmarks.py [name]   (runs every benchmark if no name is given)
+        python3 Benchmarks.py check    (only checks that every engine still gives the same results as slide)
+
+Abstraction Reference Guide:
+
+    random_board        - makes an N x N board with roughly the given fraction of its spaces filled with small pieces
+    time_it             - runs a function over and over for at least the given number of seconds and returns calls/second
+    benchmark_kernels   - compares the "recursive" and "compact" slide kernels across board sizes
+    benchmark_large     - plays random stress games on large boards and reports move latency
+    benchmark_dense     - times moves on nearly full large boards and have_lost on full ones
+    benchmark_evaluate  - compares scoring 4 x 4 boards cell by cell against the precomputed heuristic tables
+    check_engines       - plays random swipes through every engine and stops with an AssertionError at the first one
+                          that doesn't match slide with the "recursive" kernel (the original rules)
+
+"""
+
+import random
+import sys
+import time
+
+from Staff_Solution import (make_board, copy_board, place_piece, slide, preview_moves, board_hash, build_empty_tree,
+                            can_move)
+from Bitboard import to_bitboard
+import Heuristic_Tables
+import Large_Board
+import Move_Tables
+import Symmetry
+#Only there if numpy is installed (check_engines skips the batch engine without it)
+try:
+    import Batch_Engine
+except ImportError:
+    Batch_Engine = None;
+
+
+def random_board(N, fill=.6):
+    #Returns an N x N board where roughly fill (between 0 and 1) of the spaces hold a random 2, 4, 8 or 16 (pieces 1 to 4)
+    #Arg N: integer - board dimensions
+    #Arg fill: float - the fraction of spaces to fill
+
+    board = make_board(N);
+    for y in range(N):
+        for x in range(N):
+            if random.random() < fill:
+                place_piece(random.randint(1, 4), x, y, board);
+
+    return board;
+
+
+def time_it(function, seconds=.5):
+    #Calls function() until at least the given number of seconds have passed and returns how many calls ran per second
+    #Arg function: function - takes no arguments
+    #Arg seconds: float - minimum time to spend
+
+    calls = 0;
+    start = time.perf_counter();
+    while True:
+        function();
+        calls += 1;
+        elapsed = time.perf_counter() - start;
+        if elapsed >= seconds:
+            return calls / elapsed;
+
+
+def benchmark_kernels(sizes=(4, 8, 16, 32, 64, 128)):
+    #Prints how many full swipes per second each slide kernel manages on random boards of every given size
+    #Arg sizes: tuple - board dimensions to try
+
+    print("Slide kernels (swipes/second, each swipe on a fresh copy of a 60% full board)");
+    print("N\trecursive\tcompact\t\tspeedup");
+
+    for N in sizes:
+        boards = [random_board(N) for i in range(8)];
+        rates = [];
+        for kernel in ("recursive", "compact"):
+            turn = [0];
+
+            def one_swipe():
+                board = boards[turn[0] % len(boards)];
+                direction = ("left", "right", "up", "down")[turn[0] % 4];
+                turn[0] += 1;
+                slide(direction, copy_board(board), kernel);
+
+            rates.append(time_it(one_swipe));
+
+        print(str(N) + "\t" + "%.1f" % rates[0] + "\t\t" + "%.1f" % rates[1] + "\t\t" + "%.1fx" % (rates[1] / rates[0]));
+
+
+def benchmark_large(sizes=(64, 256, 1024), moves=2000):
+    #Prints the average, 99th percentile and worst time of a move in a random stress game on a large board of every given size
+    #Arg sizes: tuple - board dimensions to try
+    #Arg moves: integer - number of moves to play on each board
+
+    print("Large boards (random moves, milliseconds per move including the spawn)");
+    print("N	pieces	mean	p99	worst");
+
+    for N in sizes:
+        board = Large_Board.make_board(N);
+        Large_Board.place_random(board);
+
+        times = [];
+        for i in range(moves):
+            direction = random.choice(("left", "right", "up", "down"));
+            start = time.perf_counter();
+            Large_Board.play_move(direction, board);
+            times.append((time.perf_counter() - start) * 1000);
+
+        times.sort();
+        print(str(N) + "\t" + str(board["occupied"]) + "\t" + "%.3f" % (sum(times) / len(times)) + "\t" +
+              "%.3f" % times[int(len(times) * .99)] + "\t" + "%.3f" % times[-1]);
+
+
+def benchmark_dense(sizes=(256, 1024), moves=20):
+    #Prints the average and worst time of a move on a 90% full large board of every given size, and how long have_lost
+    #takes on a full board with no moves left - the first time, and again after one piece is placed
+    #Arg sizes: tuple - board dimensions to try
+    #Arg moves: integer - number of moves to play on each board
+
+    print("Dense large boards (milliseconds)");
+    print("N	move mean	move worst	have_lost	again");
+
+    for N in sizes:
+        board = Large_Board.make_board(N);
+        for y in range(N):
+            for x in range(N):
+                if random.random() < .9:
+                    Large_Board.place_piece(random.randint(1, 4), x, y, board);
+
+        times = [];
+        for i in range(moves):
+            direction = random.choice(("left", "right", "up", "down"));
+            start = time.perf_counter();
+            Large_Board.play_move(direction, board);
+            times.append((time.perf_counter() - start) * 1000);
+
+        #No two neighbours are ever the same: across they differ by 1 and down by 2 (mod 5)
+        full = Large_Board.make_board(N);
+        for y in range(N):
+            for x in range(N):
+                Large_Board.place_piece(1 + (x + 2*y) % 5, x, y, full);
+
+        start = time.perf_counter();
+        Large_Board.have_lost(full);
+        first = (time.perf_counter() - start) * 1000;
+
+        Large_Board.place_piece(Large_Board.get_piece(N // 2, N // 2, full), N // 2, N // 2, full);
+        start = time.perf_counter();
+        Large_Board.have_lost(full);
+        again = (time.perf_counter() - start) * 1000;
+
+        print(str(N) + "\t" + "%.3f" % (sum(times) / len(times)) + "\t\t" + "%.3f" % max(times) + "\t\t" +
+              "%.3f" % first + "\t\t" + "%.3f" % again);
+
+
+def benchmark_evaluate():
+    #Prints how many 4 x 4 positions per second get scored cell by cell and with the precomputed row tables
+
+    print("Evaluation (positions/second on 60% full 4 x 4 boards, default weights)");
+
+    start = time.perf_counter();
+    table = Heuristic_Tables.make_table();
+    print("Table build:\t" + "%.2f" % (time.perf_counter() - start) + "s");
+
+    boards = [random_board(4) for i in range(64)];
+    bitboards = [to_bitboard(board) for board in boards];
+    turn = [0];
+
+    def cells():
+        turn[0] += 1;
+        Heuristic_Tables.evaluate_cells(boards[turn[0] % len(boards)]);
+
+    def lookups():
+        turn[0] += 1;
+        Heuristic_Tables.evaluate(bitboards[turn[0] % len(bitboards)], table);
+
+    slow = time_it(cells);
+    fast = time_it(lookups);
+    print("Cell by cell:\t" + "%.0f" % slow);
+    print("Row tables:\t" + "%.0f" % fast + "\t(" + "%.1fx" % (fast / slow) + ")");
+
+
+def check_engines(boards=500, seed=None):
+    #Swipes random boards of random sizes in every direction with slide's "recursive" kernel and checks that everything
+    #else that swipes or describes a board agrees with it, printing how many comparisons each check made:
+    #    compact     - slide with the "compact" kernel (same board and the same merges, in any order)
+    #    counters    - the empty_count, empty_tree, move_counts and Zobrist hash place_piece keeps on the slid board
+    #    preview     - preview_moves and can_move
+    #    large       - Large_Board.slide (same board and merges, in any order - sparse and dense boards both)
+    #    batch       - Batch_Engine.slide_batch (same boards, changed flags and scores) if numpy is installed
+    #    tables      - Move_Tables.swipe on 4 x 4 bitboards (same board and score)
+    #    symmetry    - Symmetry's bitboard transforms against transform_board, and swipes on transformed bitboards
+    #    heuristics  - Heuristic_Tables.evaluate against evaluate_cells
+    #Arg boards: integer - number of random boards to try
+    #Arg seed: any number or string (optional) - the same seed checks the same boards
+
+    rng = random.Random(seed);
+    directions = ("left", "right", "up", "down");
+    table = Heuristic_Tables.make_table();
+    checked = {name: 0 for name in ("compact", "counters", "preview", "large", "batch", "tables", "symmetry", "heuristics")};
+
+    print("Engine checks (every engine against slide with the recursive kernel, " + str(boards) + " random boards)");
+
+    for b in range(boards):
+        #4 x 4 boards get pieces up to 16384 (so bitboards never need a 65536), the rest small ones that combine a lot
+        N = rng.choice((1, 2, 3, 4, 4, 4, 5, 8));
+        biggest = 14 if N == 4 else 4;
+        board = make_board(N, zobrist=True);
+        fill = rng.random();
+        for y in range(N):
+            for x in range(N):
+                if rng.random() < fill:
+                    place_piece(rng.randint(1, biggest), x, y, board);
+
+        rows = [row[:] for row in board];
+        legal, successors = preview_moves(board);
+        assert [row[:] for row in board] == rows, "preview_moves changed the board";
+
+        for direction in directions:
+            expected = copy_board(board);
+            changed, merges = slide(direction, expected, "recursive");
+            slid = [row[:] for row in expected];
+            score = sum(1 << piece for x, y, piece in merges);
+
+            compact = copy_board(board);
+            result = slide(direction, compact, "compact");
+            assert compact == slid and result[0] == changed and sorted(result[1]) == sorted(merges), ("compact", rows, direction);
+            checked["compact"] += 1;
+
+            for slid_board in (expected, compact):
+                plain = copy_board(slid);
+                assert slid_board.empty_count == plain.empty_count, ("empty_count", rows, direction);
+                assert slid_board.empty_tree == build_empty_tree(slid), ("empty_tree", rows, direction);
+                assert slid_board.move_counts == plain.move_counts, ("move_counts", rows, direction);
+                assert board_hash(slid_board) == board_hash(slid), ("zobrist", rows, direction);
+                checked["counters"] += 1;
+
+            assert (direction in legal) == changed == can_move(direction, board), ("preview", rows, direction);
+            assert not changed or successors[direction] == slid, ("preview", rows, direction);
+            checked["preview"] += 1;
+
+            large = Large_Board.make_board(N);
+            for y in range(N):
+                for x in range(N):
+                    Large_Board.place_piece(rows[y][x], x, y, large);
+            result = Large_Board.slide(direction, large);
+            assert result[0] == changed and sorted(result[1]) == sorted(merges), ("large", rows, direction);
+            assert [[Large_Board.get_piece(x, y, large) for x in range(N)] for y in range(N)] == slid, ("large", rows, direction);
+            checked["large"] += 1;
+
+            if Batch_Engine != None:
+                result, batch_changed, scores = Batch_Engine.slide_batch(Batch_Engine.to_array([rows]), [directions.index(direction)]);
+                assert result[0].tolist() == slid and bool(batch_changed[0]) == changed and int(scores[0]) == score, ("batch", rows, direction);
+                checked["batch"] += 1;
+
+            if N != 4:
+                continue;
+
+            bitboard = to_bitboard(rows);
+            assert Move_Tables.swipe(direction, bitboard) == (to_bitboard(slid), score), ("tables", rows, direction);
+            checked["tables"] += 1;
+
+            canonical = Symmetry.canonical_bitboard(bitboard)[0];
+            for symmetry in Symmetry.SYMMETRIES:
+                turned = Symmetry.transform_bitboard(bitboard, symmetry);
+                assert turned == to_bitboard(Symmetry.transform_board(rows, symmetry)), ("symmetry", rows, symmetry);
+                assert Symmetry.canonical_bitboard(turned)[0] == canonical, ("symmetry", rows, symmetry);
+                turned_swipe = Move_Tables.swipe(Symmetry.transform_direction(direction, symmetry), turned);
+                assert turned_swipe == (Symmetry.transform_bitboard(to_bitboard(slid), symmetry), score), ("symmetry", rows, symmetry);
+                checked["symmetry"] += 1;
+
+        if N == 4:
+            difference = Heuristic_Tables.evaluate(to_bitboard(rows), table) - Heuristic_Tables.evaluate_cells(board);
+            assert abs(difference) < 1e-6, ("heuristics", rows);
+            checked["heuristics"] += 1;
+
+    for name in checked:
+        if name == "batch" and Batch_Engine == None:
+            print(name + "\tskipped (numpy is not installed)");
+        else:
+            print(name + "\t" + str(checked[name]) + " agree");
+
+
+BENCHMARKS = {
+    "kernels": benchmark_kernels,
+    "large": benchmark_large,
+    "dense": benchmark_dense,
+    "evaluate": benchmark_evaluate,
+    "check": check_engines
+};
+
+if __name__ == "__main__":
+    chosen = sys.argv[1:] or sorted(BENCHMARKS);
+    for name in chosen:
+        BENCHMARKS[name]();
+        print("");
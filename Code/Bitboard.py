@@ -0,0 +1,94 @@
+"""
+Project: "2048 in Python!" - Bitboard backend
+
+Packs a 4 x 4 board into a single Python int so that copying, hashing and comparing boards are single integer operations.
+
+Layout:
+    Every cell is stored as a 4-bit piece ("nibble") exactly like on a board from make_board: EMPTY is 0, 1 is a 2,
+    2 is a 4, ... 15 is a 32768
+    The cell at (x,y) lives in nibble number y*4 + x, so row y is the 16 bits starting at bit 16*y
+    and the whole board fits in 64 bits (8 bytes)
+
+Abstraction Reference Guide:
+
+    to_bitboard         - converts a 4 x 4 board made by make_board into a bitboard
+    from_bitboard       - converts a bitboard back into a 4 x 4 board made by make_board
+    get_tile            - gets the piece at the given (x,y) coordinates of a bitboard
+    set_tile            - returns a new bitboard with the piece at the given (x,y) coordinates replaced
+    get_row             - gets the 16-bit row at the given y coordinate of a bitboard
+    count_empty         - returns the number of empty cells on a bitboard
+
+"""
+
+from Staff_Solution import make_board, place_piece
+
+N = 4;
+MAX_EXPONENT = 15;
+
+
+def to_bitboard(board):
+    #Returns the bitboard holding the same pieces as the given 4 x 4 board
+    #Arg board: board - a 4 x 4 board made by make_board
+
+    assert len(board) == N, "Bitboards only support 4 x 4 boards";
+
+    bitboard = 0;
+    for y in range(N):
+        for x in range(N):
+            assert 0 <= board[y][x] <= MAX_EXPONENT, "Pieces above 32768 do not fit in a bitboard nibble";
+            bitboard |= board[y][x] << (4 * (y*N + x));
+
+    return bitboard;
+
+
+def from_bitboard(bitboard):
+    #Returns a new 4 x 4 board (made by make_board) holding the same pieces as the given bitboard
+    #Arg bitboard: integer - the bitboard you want to convert
+
+    board = make_board(N);
+    for y in range(N):
+        for x in range(N):
+            place_piece(get_tile(bitboard, x, y), x, y, board);
+
+    return board;
+
+
+def get_tile(bitboard, x, y):
+    #Returns the piece at the given (x,y) coordinates of the bitboard
+    #Arg x: integer - x coordinate (0 to 3)
+    #Arg y: integer - y coordinate (0 to 3)
+    #Arg bitboard: integer - the bitboard to read
+
+    return (bitboard >> (4 * (y*N + x))) & 0xF;
+
+
+def set_tile(bitboard, x, y, piece):
+    #Returns a new bitboard with the piece at the given (x,y) coordinates replaced (ints can't be changed in place)
+    #Arg x: integer - x coordinate (0 to 3)
+    #Arg y: integer - y coordinate (0 to 3)
+    #Arg piece: integer - the piece to store (0 to 15)
+    #Arg bitboard: integer - the bitboard to start from
+
+    assert 0 <= piece <= MAX_EXPONENT, "Piece does not fit in a nibble";
+    shift = 4 * (y*N + x);
+    return (bitboard & ~(0xF << shift)) | (piece << shift);
+
+
+def get_row(bitboard, y):
+    #Returns the 16-bit row at the given y coordinate (the nibble for x = 0 is the lowest)
+    #Arg y: integer - y coordinate (0 to 3)
+    #Arg bitboard: integer - the bitboard to read
+
+    return (bitboard >> (16 * y)) & 0xFFFF;
+
+
+def count_empty(bitboard):
+    #Returns the number of empty cells (zero nibbles) on the bitboard
+    #Arg bitboard: integer - the bitboard to check
+
+    empty = 0;
+    for i in range(N * N):
+        if (bitboard >> (4 * i)) & 0xF == 0:
+            empty += 1;
+
+    return empty;
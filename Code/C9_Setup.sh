@@ -10,3 +10,6 @@ sudo python3 -m pip install getch
 
 echo "Installing termcolor"
 sudo python3 -m pip install termcolor
+
+echo "Installing numpy (only needed for Batch_Engine.py)"
+sudo python3 -m pip install numpy
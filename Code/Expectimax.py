@@ -0,0 +1,254 @@
+"""
+Project: "2048 in Python!" - Expectimax AI player
+
+Picks a swipe for a 4 x 4 board by searching every swipe (max nodes) and every piece place_random could add after it
+(chance nodes: a 2, 4 or 8 with 60/37/3 odds on any empty space). The search uses the bitboards and move tables
+(Bitboard.py, Move_Tables.py), so it follows the exact rules of this game including chain combinations.
+
+Positions that have already been worked out are kept in a transposition table (a dictionary from (bitboard, depth)
+to value) that holds at most table_size positions and throws out the least recently used one when it is full.
+A position and its 7 mirror images are worth the same, so the table is keyed on the canonical bitboard (Symmetry.py).
+
+With a time limit the search is "anytime": it searches 1 swipe ahead, then 2, then 3 and so on, and when the
+deadline hits it stops and answers with the deepest search that got far enough to pick a move. The depth reached
+and the time taken by every move are kept so latency_report can give the percentiles for the game.
+
+Abstraction Reference Guide:
+
+    make_search     - creates the search settings, transposition table and counters used by the other functions
+    evaluate        - gives a bitboard a score (higher is better) - used at the bottom of the search
+    best_move       - searches a bitboard and returns (direction, value) for the best swipe or (None, 0) if none is legal
+    choose_move     - best_move for a board made by make_board, returning just the direction
+    search_report   - returns a line of text with the search speed (nodes/second) and transposition table use
+    latency_report  - returns a line of text with the move time percentiles and depths reached in a timed search
+
+"""
+
+from collections import OrderedDict
+import math
+import time
+
+from Bitboard import to_bitboard, count_empty
+import Heuristic_Tables
+from Move_Tables import swipe
+from Symmetry import canonical_bitboard
+
+DIRECTIONS = ("left", "right", "up", "down");
+
+#Chance of place_random adding each piece (1 is a 2, 2 is a 4, 3 is an 8)
+SPAWNS = ((1, .60), (2, .37), (3, .03));
+
+#Row scores used by evaluate
+TABLE = Heuristic_Tables.make_table();
+
+
+class OutOfTime(Exception):
+    #Raised inside a timed search when its deadline passes, to unwind back to best_move
+    pass;
+
+
+def make_search(depth=2, table_size=200000, min_probability=.0001, time_limit=None):
+    #Returns a dictionary holding everything a search needs (pass the same one to every move of a game to reuse the table)
+    #Arg depth: integer - number of swipes to look ahead (with a time_limit, the deepest the search will go)
+    #Arg table_size: integer - most positions the transposition table will hold
+    #Arg min_probability: float - spawn sequences less likely than this are not searched (they are scored by evaluate)
+    #Arg time_limit: float (optional) - seconds every move may take, searching deeper and deeper until they run out
+
+    return {
+        "depth": depth,
+        "table": OrderedDict(),
+        "table_size": table_size,
+        "min_probability": min_probability,
+        "time_limit": time_limit,
+        "deadline": None,
+        "nodes": 0,
+        "hits": 0,
+        "misses": 0,
+        "seconds": 0.0,
+        "moves": 0,
+        "latencies": [],
+        "depths": []
+    };
+
+
+def evaluate(bitboard):
+    #Returns a score for the bitboard that is higher when it is easier to keep playing: more empty spaces, more
+    #neighbours that can combine and rows/columns whose pieces only go up (or only go down) along them
+    #(8 lookups in the precomputed row table from Heuristic_Tables.py, made with the default weights)
+    #Arg bitboard: integer - the bitboard to score
+
+    return Heuristic_Tables.evaluate(bitboard, TABLE);
+
+
+def _remember(search, key, value):
+    #Stores a value in the transposition table, throwing out the least recently used entry when the table is full
+    table = search["table"];
+    table[key] = value;
+    if len(table) > search["table_size"]:
+        table.popitem(last=False);
+
+
+def _max_node(bitboard, depth, probability, search):
+    #Returns the value of the best swipe from this bitboard (or evaluate's score if no swipe is possible)
+    search["nodes"] += 1;
+    if search["deadline"] != None and time.perf_counter() > search["deadline"]:
+        raise OutOfTime();
+
+    best = None;
+    for direction in DIRECTIONS:
+        new_board, score = swipe(direction, bitboard);
+        if new_board == bitboard:
+            continue;
+
+        value = _chance_node(new_board, depth, probability, search);
+        if best == None or value > best:
+            best = value;
+
+    if best == None:
+        return evaluate(bitboard);
+
+    return best;
+
+
+def _chance_node(bitboard, depth, probability, search):
+    #Returns the expected value of the bitboard after place_random adds a piece to it
+    search["nodes"] += 1;
+
+    if depth <= 1 or probability < search["min_probability"]:
+        return evaluate(bitboard);
+
+    key = (canonical_bitboard(bitboard)[0], depth);
+    table = search["table"];
+    if key in table:
+        search["hits"] += 1;
+        table.move_to_end(key);
+        return table[key];
+
+    search["misses"] += 1;
+    empty = count_empty(bitboard);
+    total = 0.0;
+    for cell in range(16):
+        if (bitboard >> (4 * cell)) & 0xF != 0:
+            continue;
+
+        for piece, chance in SPAWNS:
+            weight = chance / empty;
+            spawned = bitboard | (piece << (4 * cell));
+            total += weight * _max_node(spawned, depth - 1, probability * weight, search);
+
+    _remember(search, key, total);
+    return total;
+
+
+def _search_root(bitboard, depth, order, search):
+    #Returns a list of (direction, value) for the legal swipes in the given order, searched depth swipes ahead
+    #If the deadline passes part way, returns the swipes that were finished (a list that may be empty)
+    results = [];
+    search["nodes"] += 1;
+    for direction in order:
+        new_board, score = swipe(direction, bitboard);
+        if new_board == bitboard:
+            continue;
+
+        try:
+            results.append((direction, _chance_node(new_board, depth, 1.0, search)));
+        except OutOfTime:
+            break;
+
+    return results;
+
+
+def _pick(results):
+    #Returns the (direction, value) with the highest value or (None, 0) if there are none
+    best = (None, 0);
+    for direction, value in results:
+        if best[0] == None or value > best[1]:
+            best = (direction, value);
+    return best;
+
+
+def best_move(bitboard, search):
+    #Searches the bitboard and returns a (direction, value) tuple for the best swipe or (None, 0) if no swipe changes the board
+    #Without a time limit the search goes depth swipes ahead. With one it goes 1, 2, 3... swipes ahead until the deadline
+    #and answers with the deepest search that finished at least the swipe picked by the search before it
+    #Arg bitboard: integer - the position to search
+    #Arg search: dictionary - made by make_search
+
+    start = time.perf_counter();
+
+    if search["time_limit"] == None:
+        results = _search_root(bitboard, search["depth"], DIRECTIONS, search);
+        reached = search["depth"];
+    else:
+        #1 swipe ahead is only a few evaluations, so it always runs to the end and there is always a move to give
+        results = _search_root(bitboard, 1, DIRECTIONS, search);
+        reached = 1;
+
+        search["deadline"] = start + search["time_limit"];
+        for depth in range(2, search["depth"] + 1):
+            if len(results) == 0 or time.perf_counter() > search["deadline"]:
+                break;
+
+            #The last answer is searched first, so a deeper search cut short still counts if it finished that swipe
+            first = _pick(results)[0];
+            order = [first] + [direction for direction in DIRECTIONS if direction != first];
+            deeper = _search_root(bitboard, depth, order, search);
+            if len(deeper) == 0:
+                break;
+
+            results = deeper;
+            reached = depth;
+        search["deadline"] = None;
+
+    seconds = time.perf_counter() - start;
+    search["seconds"] += seconds;
+    search["moves"] += 1;
+    search["latencies"].append(seconds);
+    search["depths"].append(reached);
+    return _pick(results);
+
+
+def choose_move(board, search):
+    #Returns the direction ("left", "right", "up", "down") the search picks for a 4 x 4 board made by make_board
+    #or None if no swipe changes the board
+    #Arg board: board - the board to search
+    #Arg search: dictionary - made by make_search
+
+    return best_move(to_bitboard(board), search)[0];
+
+
+def search_report(search):
+    #Returns a line of text describing how fast the search has been running and how much the transposition table helps
+    #Arg search: dictionary - made by make_search
+
+    seconds = max(search["seconds"], 1e-9);
+    lookups = search["hits"] + search["misses"];
+    return ("Moves: " + str(search["moves"]) +
+            " -- Nodes: " + str(search["nodes"]) +
+            " -- Nodes/second: " + str(int(search["nodes"] / seconds)) +
+            " -- Table: " + str(len(search["table"])) + "/" + str(search["table_size"]) +
+            " -- Table hits: " + str(search["hits"]) + " (" + str(int(100 * search["hits"] / max(lookups, 1))) + "%)");
+
+
+def _percentile(values, fraction):
+    #Returns the value that the given fraction of the sorted values are at or below (nearest rank)
+    index = max(0, math.ceil(fraction * len(values)) - 1);
+    return values[min(index, len(values) - 1)];
+
+
+def latency_report(search):
+    #Returns a line of text with the 50th, 90th and 99th percentile and slowest move times (in milliseconds) and the
+    #smallest, typical and largest depth the search reached over every move made with it
+    #Arg search: dictionary - made by make_search
+
+    if len(search["latencies"]) == 0:
+        return "Moves: 0";
+
+    latencies = sorted(search["latencies"]);
+    depths = sorted(search["depths"]);
+    milliseconds = lambda seconds: "%.1f" % (1000 * seconds);
+    return ("Moves: " + str(len(latencies)) +
+            " -- Latency ms p50/p90/p99/max: " + milliseconds(_percentile(latencies, .5)) + "/" +
+            milliseconds(_percentile(latencies, .9)) + "/" + milliseconds(_percentile(latencies, .99)) + "/" +
+            milliseconds(latencies[-1]) +
+            " -- Depth min/median/max: " + str(depths[0]) + "/" + str(_percentile(depths, .5)) + "/" + str(depths[-1]));
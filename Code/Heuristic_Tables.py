@@ -0,0 +1,139 @@
+"""
+Project: "2048 in Python!" - Precomputed heuristic tables for evaluating positions
+
+The things a bot looks for in a position - empty spaces, rows that only go up (or only go down), neighbours that are
+close in value and neighbours that can combine - can all be scored one row (or column) at a time. A 4 x 4 row is
+only 16 bits on a bitboard (Bitboard.py), so every one of these features is worked out once for all 65536 rows and
+a board is scored by looking up its 4 rows and its 4 columns (the rows of the transposed board) in one table.
+
+How much each feature counts is up to the caller: make_table mixes the feature tables with a dictionary of weights.
+Every space is in one row and one column, so per-space features (like empty) end up counted twice.
+
+Abstraction Reference Guide:
+
+    FEATURES        - names of the features every row is scored on
+    WEIGHTS         - default weights (these give the same scores as the original expectimax evaluation)
+    row_features    - returns the feature values for a list of 4 pieces
+    make_table      - returns the table of weighted row scores for a dictionary of weights (built once per weights)
+    evaluate        - scores a bitboard with a table: 8 lookups (4 rows + 4 columns)
+    evaluate_cells  - scores a board made by make_board cell by cell with get_piece (any size, used to check the tables)
+
+"""
+
+from Move_Tables import transpose, ROWS
+from Staff_Solution import get_piece
+
+FEATURES = ("empty", "monotonicity", "smoothness", "merges");
+
+WEIGHTS = {
+    "empty": 5.0,
+    "monotonicity": 1.0,
+    "smoothness": 0.0,
+    "merges": 2.0
+};
+
+
+def row_features(pieces):
+    #Returns a dictionary with the value of every feature for one row or column
+    #    empty        - number of empty spaces
+    #    monotonicity - minus the smaller of how much the row goes up and how much it goes down (0 if it only goes one way)
+    #    smoothness   - minus the total difference between neighbouring pieces (empty spaces are skipped)
+    #    merges       - number of neighbouring pairs that are the same piece
+    #Arg pieces: list - the pieces of the row in order (0 is empty, 1 is a 2, 2 is a 4...)
+
+    increasing = 0;
+    decreasing = 0;
+    merges = 0;
+    for x in range(len(pieces) - 1):
+        if pieces[x] != 0 and pieces[x] == pieces[x+1]:
+            merges += 1;
+        if pieces[x] > pieces[x+1]:
+            decreasing += pieces[x] ** 2 - pieces[x+1] ** 2;
+        else:
+            increasing += pieces[x+1] ** 2 - pieces[x] ** 2;
+
+    filled = [piece for piece in pieces if piece != 0];
+    smoothness = 0;
+    for x in range(len(filled) - 1):
+        smoothness -= abs(filled[x] - filled[x+1]);
+
+    return {
+        "empty": len(pieces) - len(filled),
+        "monotonicity": -min(increasing, decreasing),
+        "smoothness": smoothness,
+        "merges": merges
+    };
+
+
+#Feature name -> list with that feature's value for every 16-bit row (built the first time a table is made)
+FEATURE_TABLES = {};
+
+#Weights (as a sorted tuple of items) -> table already made for them
+TABLES = {};
+
+
+def _build_features():
+    #Fills FEATURE_TABLES by scoring every possible row once
+    tables = {name: [0] * ROWS for name in FEATURES};
+    for row in range(ROWS):
+        features = row_features([(row >> (4 * x)) & 0xF for x in range(4)]);
+        for name in FEATURES:
+            tables[name][row] = features[name];
+    FEATURE_TABLES.update(tables);
+
+
+def make_table(weights=WEIGHTS):
+    #Returns a list with the weighted score of every 16-bit row (the same list is handed back for the same weights)
+    #Arg weights: dictionary (optional) - feature name -> weight (features left out count 0)
+
+    for name in weights:
+        assert name in FEATURES, "Unknown feature: " + str(name);
+
+    key = tuple(sorted(weights.items()));
+    if key in TABLES:
+        return TABLES[key];
+
+    if len(FEATURE_TABLES) == 0:
+        _build_features();
+
+    table = [0.0] * ROWS;
+    for name in weights:
+        weight = weights[name];
+        if weight == 0:
+            continue;
+        feature = FEATURE_TABLES[name];
+        for row in range(ROWS):
+            table[row] += weight * feature[row];
+
+    TABLES[key] = table;
+    return table;
+
+
+def evaluate(bitboard, table):
+    #Returns the score of a 4 x 4 bitboard: the table entries of its 4 rows plus those of its 4 columns
+    #Arg bitboard: integer - the position to score
+    #Arg table: list - made by make_table
+
+    columns = transpose(bitboard);
+    return (table[bitboard & 0xFFFF] + table[(bitboard >> 16) & 0xFFFF] +
+            table[(bitboard >> 32) & 0xFFFF] + table[(bitboard >> 48) & 0xFFFF] +
+            table[columns & 0xFFFF] + table[(columns >> 16) & 0xFFFF] +
+            table[(columns >> 32) & 0xFFFF] + table[(columns >> 48) & 0xFFFF]);
+
+
+def evaluate_cells(board, weights=WEIGHTS):
+    #Returns the same score as evaluate, but works it out cell by cell with get_piece (for boards of any size)
+    #Arg board: board - a board made by make_board
+    #Arg weights: dictionary (optional) - feature name -> weight
+
+    N = len(board);
+    lines = [[get_piece(x, y, board) for x in range(N)] for y in range(N)];
+    lines += [[get_piece(x, y, board) for y in range(N)] for x in range(N)];
+
+    score = 0.0;
+    for line in lines:
+        features = row_features(line);
+        for name in weights:
+            score += weights[name] * features[name];
+
+    return score;
@@ -0,0 +1,457 @@
+"""
+Project: "2048 in Python!" - Large board mode
+
+Boards from make_board store every space, so a 1024 x 1024 board is a million list entries and every swipe has to
+look at all of them. Large boards only store the spaces that hold a piece (a stress game on a huge board is mostly
+empty), once by row and once by column, so a swipe only touches the pieces that are actually there.
+
+Once a board is mostly full those dictionaries cost more than they save, so at DENSE_FILL it switches to one
+bytearray per row holding every space, and a swipe slides each row (or each column, cut out of the rows when it is
+needed) with bytes operations. It switches back to dictionaries if it empties out below SPARSE_FILL.
+
+The rules are the same as Staff_Solution.py (pieces are integer exponents, chain combinations are allowed and
+place_random places a 2, 4 or 8 with 60/37/3 odds), and the functions have the same names and arguments, so a
+large board can be played exactly like a normal one.
+
+A large board is a dictionary:
+    "N"         - board dimensions
+    "dense"     - True if the rows are bytearrays (see DENSE_FILL) and False if they are dictionaries
+    "rows"      - rows[y] holds row y: a dictionary from x to the piece at (x,y) with the empty spaces left out, or
+                  on a dense board a bytearray of all N spaces (EMPTY where there is no piece)
+    "columns"   - columns[x] is a dictionary from y to the piece at (x,y) (the same pieces, looked at the other way)
+                  - None on a dense board
+    "occupied"  - how many spaces hold a piece
+    "dirty"     - set of the y coordinates of rows that changed since they were last drawn by render_window
+    "drawn"     - dictionary from y to the last text render_window made for that row (and the window it was made for)
+    "unchecked" - dense boards: {"rows": set, "columns": set} of the lines changed since have_lost last looked at them
+    "pairs"     - dense boards: {"rows": set, "columns": set} of the lines have_lost found two neighbouring equal pieces in
+
+Abstraction Reference Guide:
+
+    make_board      - creates a new, empty N x N large board
+    get_piece       - gets the piece at the given (x,y) coordinates or returns None if the position is invalid
+    place_piece     - places the given piece at the given (x,y) coordinates and returns True or returns False if the position is invalid
+    board_full      - returns True if every space holds a piece
+    place_random    - places a random 2 OR 4 OR 8 in an empty space, returning the (x, y, piece) placed or False
+    slide           - slides every piece in the given direction and returns (changed, merges)
+    play_move       - slides the board and places a random piece, returning (changed, merges, spawn)
+    have_lost       - returns True if the board is full and no moves remain
+    render_window   - returns the text of the part of the board inside the given window (the viewport)
+    print_window    - prints the part of the board inside the given window
+
+"""
+
+import random
+import re
+
+from Staff_Solution import EMPTY, piece_to_string
+
+#A board becomes dense once at least DENSE_FILL of its spaces hold pieces, and sparse again below SPARSE_FILL
+#(far enough apart that a board hovering around one of them doesn't keep switching)
+DENSE_FILL = .5;
+SPARSE_FILL = .25;
+
+#Finds two neighbouring pieces that are the same in a bytes line (a full line can only move if it has them)
+PAIR = re.compile(rb"([^\x00])\1");
+
+
+def make_board(N):
+    #Returns a new N x N empty large board
+    #Arg N: integer - board dimensions
+
+    assert N >= 1, "Invalid board dimension";
+    assert type(N) == int, "N must be an integer";
+    return {
+        "N": N,
+        "dense": False,
+        "rows": [{} for y in range(N)],
+        "columns": [{} for x in range(N)],
+        "occupied": 0,
+        "dirty": set(range(N)),
+        "drawn": {},
+        "unchecked": {"rows": set(), "columns": set()},
+        "pairs": {"rows": set(), "columns": set()}
+    };
+
+
+def _make_dense(board):
+    #Switches the board to one bytearray per row (every line counts as unchecked by have_lost)
+    N = board["N"];
+    rows = [bytearray(N) for y in range(N)];
+    for y in range(N):
+        for x, piece in board["rows"][y].items():
+            rows[y][x] = piece;
+
+    board["dense"] = True;
+    board["rows"] = rows;
+    board["columns"] = None;
+    board["unchecked"] = {"rows": set(range(N)), "columns": set(range(N))};
+    board["pairs"] = {"rows": set(), "columns": set()};
+
+
+def _make_sparse(board):
+    #Switches the board back to storing only the spaces that hold a piece, by row and by column
+    N = board["N"];
+    rows = [{} for y in range(N)];
+    columns = [{} for x in range(N)];
+    for y in range(N):
+        for x, piece in enumerate(board["rows"][y]):
+            if piece != EMPTY:
+                rows[y][x] = piece;
+                columns[x][y] = piece;
+
+    board["dense"] = False;
+    board["rows"] = rows;
+    board["columns"] = columns;
+    board["unchecked"] = {"rows": set(), "columns": set()};
+    board["pairs"] = {"rows": set(), "columns": set()};
+
+
+def _fit_storage(board):
+    #Switches the board between dictionaries and bytearrays if it has filled up past DENSE_FILL or emptied out below SPARSE_FILL
+    spaces = board["N"] * board["N"];
+    if not board["dense"] and board["occupied"] >= DENSE_FILL * spaces:
+        _make_dense(board);
+    elif board["dense"] and board["occupied"] < SPARSE_FILL * spaces:
+        _make_sparse(board);
+
+
+def _columns(board):
+    #Returns every column of a dense board as bytes (columns[x][y] is the piece at (x,y))
+    N = board["N"];
+    spaces = b"".join(board["rows"]);
+    return [spaces[x::N] for x in range(N)];
+
+
+def get_piece(x, y, board):
+    #Returns the piece at the given (x,y) coordinates (EMPTY if nothing is there) or None if the position is invalid
+    N = board["N"];
+
+    if x >= N or y >= N or x < 0 or y < 0:
+        return None;
+
+    if board["dense"]:
+        return board["rows"][y][x];
+
+    return board["rows"][y].get(x, EMPTY);
+
+
+def place_piece(piece, x, y, board):
+    #Places the piece at the given (x,y) coordinates, overwriting whatever was there
+    #Returns True if the piece is placed successfully and False otherwise
+    N = board["N"];
+
+    if x >= N or y >= N or x < 0 or y < 0:
+        return False;
+
+    row = board["rows"][y];
+    board["dirty"].add(y);
+
+    if board["dense"]:
+        board["occupied"] += (piece != EMPTY) - (row[x] != EMPTY);
+        row[x] = piece;
+        board["unchecked"]["rows"].add(y);
+        board["unchecked"]["columns"].add(x);
+        _fit_storage(board);
+        return True;
+
+    if x in row:
+        board["occupied"] -= 1;
+        del row[x];
+        del board["columns"][x][y];
+
+    if piece != EMPTY:
+        board["occupied"] += 1;
+        row[x] = piece;
+        board["columns"][x][y] = piece;
+
+    _fit_storage(board);
+    return True;
+
+
+def board_full(board):
+    #Returns True if every space on the large board holds a piece and False otherwise
+    return board["occupied"] == board["N"] * board["N"];
+
+
+def place_random(board, rng=random):
+    #Places a 2 (60%) or 4 (37%) or 8 (3%) randomly on the board in an empty space
+    #Returns the (x, y, piece) that was placed (which counts as True) or False if the board is full
+    #Arg rng: random number generator (optional) - exactly two numbers are used, one for the piece and one for the position
+
+    if board_full(board): return False;
+
+    generated = rng.random() * 100;
+    if generated < 60:
+        to_place = 1;
+    elif generated < 97:
+        to_place = 2;
+    else:
+        to_place = 3;
+
+    N = board["N"];
+    rows = board["rows"];
+    dense = board["dense"];
+
+    #A single random number picks which empty space (counting row by row) gets the piece: skip whole rows by their
+    #number of empty spaces, then walk along the row that holds it
+    skip = int(rng.random() * (N * N - board["occupied"]));
+    random_y = 0;
+    while True:
+        empty = rows[random_y].count(EMPTY) if dense else N - len(rows[random_y]);
+        if skip < empty:
+            break;
+        skip -= empty;
+        random_y += 1;
+
+    row = rows[random_y];
+    if dense:
+        random_x = row.find(EMPTY);
+        for i in range(skip):
+            random_x = row.find(EMPTY, random_x + 1);
+    else:
+        random_x = 0;
+        while True:
+            if random_x not in row:
+                if skip == 0:
+                    break;
+                skip -= 1;
+            random_x += 1;
+
+    place_piece(to_place, random_x, random_y, board);
+    return (random_x, random_y, to_place);
+
+
+def _slide_bytes(line, towards_end, N, k, horizontal, merges):
+    #Returns the slid copy of one row or column of a dense board as bytes, adding its combinations to merges
+    #Arg line: bytearray or bytes - the N spaces of line number k
+    #Arg towards_end: boolean - True for right and down
+    #Arg horizontal: boolean - True if the line is a row
+
+    pieces = line.replace(b"\x00", b"");
+    if towards_end:
+        pieces = pieces[::-1];
+
+    #No two neighbouring pieces are the same, so nothing combines and the pieces only get packed against the edge
+    if PAIR.search(pieces) == None:
+        stack = pieces;
+
+    #Otherwise the slid pieces behave like a stack, as in slide
+    else:
+        stack = [];
+        top = EMPTY;
+        for piece in pieces:
+            while piece == top:
+                stack.pop();
+                piece += 1;
+                at = N-1-len(stack) if towards_end else len(stack);
+                merges.append((at, k, piece) if horizontal else (k, at, piece));
+                top = stack[-1] if len(stack) > 0 else EMPTY;
+            stack.append(piece);
+            top = piece;
+        stack = bytes(stack);
+
+    if towards_end:
+        return bytes(N - len(stack)) + stack[::-1];
+    return stack + bytes(N - len(stack));
+
+
+def _slide_dense(direction, board):
+    #slide for a dense board: slides every row (or every column, cut out of the rows and put back) with bytes operations
+    N = board["N"];
+    horizontal = direction == "left" or direction == "right";
+    towards_end = direction == "right" or direction == "down";
+    rows = board["rows"];
+
+    changed = False;
+    merges = [];
+    lines = rows if horizontal else _columns(board);
+    slid_lines = [];
+
+    for k in range(N):
+        slid = _slide_bytes(lines[k], towards_end, N, k, horizontal, merges);
+        if slid != lines[k]:
+            changed = True;
+            board["unchecked"]["rows" if horizontal else "columns"].add(k);
+        slid_lines.append(slid);
+
+    if not changed:
+        return (False, merges);
+
+    #Rows go back in place, columns are turned back into rows - either way only rows that differ are replaced
+    if not horizontal:
+        spaces = b"".join(slid_lines);
+        slid_lines = [spaces[y::N] for y in range(N)];
+
+    for y in range(N):
+        if slid_lines[y] != rows[y]:
+            rows[y][:] = slid_lines[y];
+            board["dirty"].add(y);
+            board["unchecked"]["rows"].add(y);
+
+    if horizontal:
+        board["unchecked"]["columns"].update(range(N));
+
+    board["occupied"] -= len(merges);
+    _fit_storage(board);
+    return (True, merges);
+
+
+def slide(direction, board):
+    #Slides every piece on the board in the given direction (same rules as slide in Staff_Solution.py)
+    #Returns a (changed, merges) tuple - merges is a list of (x, y, piece) tuples, one for every combination made
+    #Arg direction: string - "left", "right", "up", "down"
+    #Arg board: large board - the board you wish to slide
+
+    assert direction in ("left", "right", "up", "down"), "Invalid direction passed in";
+
+    if board["dense"]:
+        return _slide_dense(direction, board);
+
+    N = board["N"];
+    horizontal = direction == "left" or direction == "right";
+    towards_end = direction == "right" or direction == "down";
+
+    #Left/right slide every row and keep the columns in step, up/down do the opposite
+    if horizontal:
+        lines, crossing = board["rows"], board["columns"];
+    else:
+        lines, crossing = board["columns"], board["rows"];
+
+    changed = False;
+    merges = [];
+    dirty = board["dirty"];
+
+    for k in range(N):
+        line = lines[k];
+        if len(line) == 0:
+            continue;
+
+        #Pieces closest to the edge we are sliding towards go first, and the ones already slid behave like a stack
+        positions = sorted(line, reverse=towards_end);
+        stack = [];
+        for position in positions:
+            piece = line[position];
+            while len(stack) > 0 and stack[-1] == piece:
+                at = len(stack) - 1;
+                if towards_end: at = N-1-at;
+                piece += 1;
+                merges.append((at, k, piece) if horizontal else (k, at, piece));
+                stack.pop();
+
+            stack.append(piece);
+
+        #Nothing moved in this line if every piece is already packed against the edge and nothing combined
+        if len(stack) == len(positions):
+            packed = True;
+            for i in range(len(positions)):
+                if positions[i] != (N-1-i if towards_end else i):
+                    packed = False;
+                    break;
+            if packed:
+                continue;
+
+        changed = True;
+        for position in positions:
+            del crossing[position][k];
+            if not horizontal: dirty.add(position);
+        line.clear();
+
+        for i in range(len(stack)):
+            position = N-1-i if towards_end else i;
+            line[position] = stack[i];
+            crossing[position][k] = stack[i];
+            if not horizontal: dirty.add(position);
+
+        board["occupied"] -= len(positions) - len(stack);
+        if horizontal: dirty.add(k);
+
+    return (changed, merges);
+
+
+def play_move(direction, board, rng=random):
+    #Plays one full turn: slides the board and, if anything changed, places a random piece
+    #Returns a (changed, merges, spawn) tuple - spawn is the (x, y, piece) placed or None if nothing was placed
+    #Arg rng: random number generator (optional) - passed on to place_random
+
+    changed, merges = slide(direction, board);
+
+    spawn = None;
+    if changed:
+        spawn = place_random(board, rng) or None;
+
+    return (changed, merges, spawn);
+
+
+def have_lost(board):
+    #Returns True if the board is full and no two neighbouring pieces are the same and False otherwise
+    #A board that isn't full never loses, and a full board is always dense: it remembers which lines hold a pair of
+    #neighbouring equal pieces, so only the lines changed since the last call are looked at again
+
+    if not board_full(board):
+        return False;
+
+    N = board["N"];
+    for kind in ("rows", "columns"):
+        unchecked = board["unchecked"][kind];
+        if len(unchecked) == 0:
+            continue;
+
+        #Cutting out a few columns is quicker than turning the whole board around
+        if kind == "rows":
+            lines = board["rows"];
+        elif len(unchecked) * 64 < N:
+            lines = {x: bytes(row[x] for row in board["rows"]) for x in unchecked};
+        else:
+            lines = _columns(board);
+
+        pairs = board["pairs"][kind];
+        for k in unchecked:
+            if PAIR.search(lines[k]) == None:
+                pairs.discard(k);
+            else:
+                pairs.add(k);
+        unchecked.clear();
+
+    return len(board["pairs"]["rows"]) == 0 and len(board["pairs"]["columns"]) == 0;
+
+
+def render_window(board, x, y, width, height):
+    #Returns a list with the text of every row in the window starting at (x,y) that is width spaces wide and height
+    #rows tall (clipped to the board). Rows that haven't changed since the last call with the same window are reused
+    #Arg x: integer - x coordinate of the top left space of the window
+    #Arg y: integer - y coordinate of the top left space of the window
+    #Arg width: integer - number of spaces across
+    #Arg height: integer - number of rows down
+
+    N = board["N"];
+    rows = board["rows"];
+    dirty = board["dirty"];
+    drawn = board["drawn"];
+
+    x_end = min(N, x + width);
+    window = (x, x_end);
+
+    lines = [];
+    for row_y in range(max(0, y), min(N, y + height)):
+        saved = drawn.get(row_y);
+        if row_y in dirty or saved == None or saved[0] != window:
+            row = rows[row_y];
+            if board["dense"]:
+                pieces = row[max(0, x):x_end];
+            else:
+                pieces = [row.get(column, EMPTY) for column in range(max(0, x), x_end)];
+            text = "".join(piece_to_string(piece).rjust(7) for piece in pieces);
+            saved = drawn[row_y] = (window, text);
+            dirty.discard(row_y);
+
+        lines.append(saved[1]);
+
+    return lines;
+
+
+def print_window(board, x, y, width, height):
+    #Prints the part of the board inside the given window (see render_window) with a line saying where the window is
+    print("Showing x " + str(x) + " to " + str(x + width - 1) + ", y " + str(y) + " to " + str(y + height - 1) +
+          " of a " + str(board["N"]) + " x " + str(board["N"]) + " board");
+    print("\n".join(render_window(board, x, y, width, height)));
@@ -0,0 +1,178 @@
+"""
+Project: "2048 in Python!" - Monte Carlo rollout player
+
+Picks a swipe by trying it: for every legal direction it plays K random games ("rollouts") from the board that
+swipe leads to, each one until have_lost says the game is over, and picks the direction with the best average score.
+
+Rollouts are handed out in batches to a pool of worker processes (one per core) and every move has a time budget:
+once it runs out, batches that haven't come back yet are ignored and the move is picked from the rollouts finished
+so far. The player keeps count of how many rollouts it has played per second so scaling with cores can be measured.
+
+Abstraction Reference Guide:
+
+    rollout         - plays one random game from a board after swiping it in the given direction and returns its score
+    run_batch       - plays a batch of rollouts for one direction (what each worker process is given to do)
+    make_player     - creates the player settings, worker pool and counters
+    choose_move     - returns the direction with the best average rollout score (or None if no swipe is legal)
+    player_report   - returns a line of text with the number of rollouts and rollouts/second
+    close_player    - shuts down the player's worker pool
+
+"""
+
+import multiprocessing
+import os
+import time
+
+from Staff_Solution import copy_board, make_rng, play_move, can_move, have_lost
+
+DIRECTIONS = ("left", "right", "up", "down");
+
+
+def rollout(board, direction, rng, max_moves=None):
+    #Swipes a copy of the board in the given direction, then plays random legal swipes until the game is lost
+    #Returns the score of the rollout (the value of every piece made by combining, including the first swipe)
+    #Arg board: board - the starting position (not changed)
+    #Arg direction: string - the first swipe to make
+    #Arg rng: random number generator - used for the spawns and the random swipes
+    #Arg max_moves: integer (optional) - stop the rollout after this many swipes
+
+    board = copy_board(board);
+    score = 0;
+    moves = 0;
+
+    while max_moves == None or moves < max_moves:
+        changed, merges, spawn = play_move(direction, board, rng);
+        for x, y, piece in merges:
+            score += 1 << piece;
+        moves += 1;
+
+        if have_lost(board):
+            break;
+
+        legal = [option for option in DIRECTIONS if can_move(option, board)];
+        direction = legal[int(rng.random() * len(legal))];
+
+    return score;
+
+
+def run_batch(job):
+    #Plays a batch of rollouts for one direction and returns (direction, total score, rollouts played)
+    #Stops early if the deadline (a time.time() value) passes before the batch is done
+    #Arg job: tuple - (rows of the board, direction, seed, number of rollouts, deadline, max_moves)
+
+    rows, direction, seed, count, deadline, max_moves = job;
+    board = copy_board(rows);
+    rng = make_rng(seed);
+
+    total = 0;
+    played = 0;
+    while played < count and time.time() < deadline:
+        total += rollout(board, direction, rng, max_moves);
+        played += 1;
+
+    return (direction, total, played);
+
+
+def make_player(rollouts=64, time_budget=.5, batch_size=8, workers=None, max_moves=None, seed=None):
+    #Returns a dictionary holding the player's settings, worker pool, random numbers and counters
+    #Arg rollouts: integer - K, the number of rollouts to play for every legal direction
+    #Arg time_budget: float - most seconds a single move may take
+    #Arg batch_size: integer - rollouts handed to a worker at a time
+    #Arg workers: integer (optional) - worker processes to use (one per core if not given, 0 plays everything in this process)
+    #Arg max_moves: integer (optional) - longest a single rollout may go
+    #Arg seed: any number or string (optional) - seed for the seeds handed to every batch
+
+    if workers == None:
+        workers = os.cpu_count() or 1;
+
+    return {
+        "rollouts": rollouts,
+        "time_budget": time_budget,
+        "batch_size": batch_size,
+        "max_moves": max_moves,
+        "rng": make_rng(seed),
+        "pool": multiprocessing.Pool(workers) if workers > 0 else None,
+        "played": 0,
+        "seconds": 0.0,
+        "moves": 0
+    };
+
+
+def choose_move(board, player):
+    #Returns the legal direction with the best average rollout score or None if no swipe changes the board
+    #Arg board: board - the position to pick a swipe for
+    #Arg player: dictionary - made by make_player
+
+    legal = [direction for direction in DIRECTIONS if can_move(direction, board)];
+    if len(legal) == 0:
+        return None;
+    if len(legal) == 1:
+        return legal[0];
+
+    start = time.time();
+    deadline = start + player["time_budget"];
+    rows = [row[:] for row in board];
+    rng = player["rng"];
+
+    #Every direction gets its K rollouts split into batches (interleaved so a deadline cuts them all equally short)
+    jobs = [];
+    for first in range(0, player["rollouts"], player["batch_size"]):
+        count = min(player["batch_size"], player["rollouts"] - first);
+        for direction in legal:
+            jobs.append((rows, direction, int(rng.random() * 2**63), count, deadline, player["max_moves"]));
+
+    totals = {direction: 0 for direction in legal};
+    played = {direction: 0 for direction in legal};
+
+    if player["pool"] == None:
+        results = map(run_batch, jobs);
+    else:
+        pending = [player["pool"].apply_async(run_batch, (job,)) for job in jobs];
+        results = [];
+        for result in pending:
+            #Batches still running when the budget runs out are left behind (their late answers are thrown away)
+            try:
+                results.append(result.get(max(0.0, deadline - time.time())));
+            except multiprocessing.TimeoutError:
+                break;
+
+    for direction, total, count in results:
+        totals[direction] += total;
+        played[direction] += count;
+
+    player["played"] += sum(played.values());
+    player["seconds"] += time.time() - start;
+    player["moves"] += 1;
+
+    best = None;
+    for direction in legal:
+        if played[direction] == 0:
+            continue;
+        if best == None or totals[direction] / played[direction] > totals[best] / played[best]:
+            best = direction;
+
+    #Not a single rollout finished in time, so any legal swipe will do
+    if best == None:
+        best = legal[0];
+
+    return best;
+
+
+def player_report(player):
+    #Returns a line of text with how many rollouts the player has played and how many per second
+    #Arg player: dictionary - made by make_player
+
+    seconds = max(player["seconds"], 1e-9);
+    return ("Moves: " + str(player["moves"]) +
+            " -- Rollouts: " + str(player["played"]) +
+            " -- Rollouts/second: " + str(int(player["played"] / seconds)));
+
+
+def close_player(player):
+    #Shuts down the player's worker pool (the player can't be used after this)
+    #Arg player: dictionary - made by make_player
+
+    if player["pool"] != None:
+        player["pool"].terminate();
+        player["pool"].join();
+        player["pool"] = None;
@@ -0,0 +1,189 @@
+"""
+Project: "2048 in Python!" - Precomputed move tables for bitboards
+
+Sliding a 4 x 4 bitboard (see Bitboard.py) only ever depends on one row at a time, and a row is only 16 bits, so the
+result of sliding every one of the 65536 possible rows left and right is worked out once and stored in tables.
+A left or right swipe is then four table lookups, and up/down are the same lookups on the transposed board.
+
+The tables follow the exact rules of move() in Staff_Solution.py, including chain combinations: a piece that
+combines keeps moving and can combine again (a row of 2 2 4 slides left into a single 8).
+
+The one exception is the biggest piece a nibble can hold: two 32768s would make a 65536, which doesn't fit, so
+on a bitboard they refuse to combine (MAX_EXPONENT) instead of one of them silently disappearing.
+
+The tables are saved to move_tables.cache next to this file the first time they are built and loaded from it after that.
+The file starts with MAGIC, which names the version of the rules that built it (change RULES_VERSION whenever
+slide_row changes), and a handful of rows are checked against slide_row when it is loaded - a cache that doesn't match
+is rebuilt.
+
+Abstraction Reference Guide:
+
+    slide_row       - slides a single 16-bit row towards x = 0 and returns (new_row, score) - used to build the tables
+    reverse_row     - reverses the order of the four nibbles in a 16-bit row
+    build_tables    - computes the left/right row tables and the score table from scratch
+    load_tables     - loads the tables from the cache file, building (and saving) them if needed
+    transpose       - swaps the rows and columns of a bitboard
+    swipe           - slides a bitboard in the given direction and returns (new_bitboard, score)
+
+"""
+
+from array import array
+import os
+
+CACHE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "move_tables.cache");
+ROWS = 65536;
+
+#Biggest piece a nibble can hold (15 is a 32768)
+MAX_EXPONENT = 15;
+
+#Change RULES_VERSION whenever slide_row changes, so caches built with the old rules are thrown away
+RULES_VERSION = 2;
+MAGIC = b"MOVETBL" + bytes([RULES_VERSION]);
+
+#Rows checked against slide_row every time the cache is loaded
+CHECK_ROWS = range(0, ROWS, 4099);
+
+
+def slide_row(row):
+    #Slides the four nibbles of a 16-bit row towards x = 0 (the lowest nibble) using the same rules as move()
+    #Returns a (new_row, score) tuple where score is the total value of every piece created by a combination
+    #Arg row: integer - the 16-bit row to slide
+
+    #Pieces are moved in order, starting with the one closest to the edge. Every piece travels until it hits another
+    #piece, and while that piece is the same, the two combine and the new piece keeps travelling (chain combinations)
+    stack = [];
+    score = 0;
+    for x in range(4):
+        exponent = (row >> (4 * x)) & 0xF;
+        if exponent == 0:
+            continue;
+
+        #65536 can't be stored in a nibble, so two 32768s stay side by side (a 4 x 4 game practically never gets there)
+        while len(stack) > 0 and stack[-1] == exponent and exponent < MAX_EXPONENT:
+            stack.pop();
+            exponent += 1;
+            score += 1 << exponent;
+
+        stack.append(exponent);
+
+    new_row = 0;
+    for x in range(len(stack)):
+        new_row |= stack[x] << (4 * x);
+
+    return (new_row, score);
+
+
+def reverse_row(row):
+    #Returns the 16-bit row with its four nibbles in the opposite order
+    #Arg row: integer - the 16-bit row to reverse
+
+    return ((row & 0xF) << 12) | ((row & 0xF0) << 4) | ((row >> 4) & 0xF0) | (row >> 12);
+
+
+def build_tables():
+    #Computes the three tables from scratch and returns them as a (left, right, score) tuple of arrays
+    #left[row] and right[row] are the row after sliding left/right and score[row] is the score of sliding left
+    #(sliding right scores score[reverse_row(row)])
+
+    left = array('H', bytes(2 * ROWS));
+    right = array('H', bytes(2 * ROWS));
+    score = array('I', bytes(4 * ROWS));
+
+    for row in range(ROWS):
+        left[row], score[row] = slide_row(row);
+
+    for row in range(ROWS):
+        right[row] = reverse_row(left[reverse_row(row)]);
+
+    return (left, right, score);
+
+
+def load_tables(path=CACHE_PATH):
+    #Returns the (left, right, score) tables, reading them from the cache file at the given path if it exists and was
+    #built by these rules, and building and saving them otherwise
+    #Arg path: string - the cache file to use
+
+    left = array('H');
+    right = array('H');
+    score = array('I');
+
+    try:
+        with open(path, "rb") as cache:
+            if cache.read(len(MAGIC)) == MAGIC:
+                left.fromfile(cache, ROWS);
+                right.fromfile(cache, ROWS);
+                score.fromfile(cache, ROWS);
+                if all((left[row], score[row]) == slide_row(row) for row in CHECK_ROWS):
+                    return (left, right, score);
+    except (OSError, EOFError):
+        pass;
+
+    left, right, score = build_tables();
+
+    #Written to a temporary file and renamed over the cache, so another process never reads a half-written file
+    #(a read-only install just means the tables get rebuilt next time)
+    temporary = path + "." + str(os.getpid()) + ".tmp";
+    try:
+        with open(temporary, "wb") as cache:
+            cache.write(MAGIC);
+            left.tofile(cache);
+            right.tofile(cache);
+            score.tofile(cache);
+        os.replace(temporary, path);
+    except OSError:
+        try:
+            os.remove(temporary);
+        except OSError:
+            pass;
+
+    return (left, right, score);
+
+
+ROW_LEFT, ROW_RIGHT, ROW_SCORE = load_tables();
+
+
+def transpose(bitboard):
+    #Returns the bitboard with its rows and columns swapped (the piece at (x,y) moves to (y,x))
+    #Arg bitboard: integer - the bitboard to transpose
+
+    a1 = bitboard & 0xF0F00F0FF0F00F0F;
+    a2 = bitboard & 0x0000F0F00000F0F0;
+    a3 = bitboard & 0x0F0F00000F0F0000;
+    a = a1 | (a2 << 12) | (a3 >> 12);
+    b1 = a & 0xFF00FF0000FF00FF;
+    b2 = a & 0x00FF00FF00000000;
+    b3 = a & 0x00000000FF00FF00;
+    return b1 | (b2 >> 24) | (b3 << 24);
+
+
+def swipe(direction, bitboard):
+    #Slides the whole bitboard in the given direction with four table lookups
+    #Returns a (new_bitboard, score) tuple - the swipe did something if new_bitboard != bitboard
+    #Arg direction: string - "left", "right", "up", "down"
+    #Arg bitboard: integer - the bitboard to slide
+
+    assert direction in ("left", "right", "up", "down"), "Invalid direction passed in";
+
+    #Up and down are left and right on the transposed board (columns become rows with y = 0 as the lowest nibble)
+    if direction == "up" or direction == "down":
+        bitboard = transpose(bitboard);
+
+    if direction == "left" or direction == "up":
+        table = ROW_LEFT;
+    else:
+        table = ROW_RIGHT;
+
+    result = 0;
+    score = 0;
+    for y in range(4):
+        row = (bitboard >> (16 * y)) & 0xFFFF;
+        result |= table[row] << (16 * y);
+        if table is ROW_LEFT:
+            score += ROW_SCORE[row];
+        else:
+            score += ROW_SCORE[reverse_row(row)];
+
+    if direction == "up" or direction == "down":
+        result = transpose(result);
+
+    return (result, score);
@@ -0,0 +1,309 @@
+"""
+Project: "2048 in Python!" - N-tuple network trainer
+
+Learns how good a 4 x 4 position is by playing headless games (bitboards and move tables, so the real swipe rules
+including chain combinations) and using temporal-difference learning on an N-tuple network: a handful of groups
+of spaces ("tuples", e.g. every row, every column or 2 x 3 blocks), each with a table holding a learned value for
+every combination of pieces that group can hold. A position is worth the sum of its tuples' table entries.
+
+The tables are big (16^6 floats for one 2 x 3 block), so all of them live back to back in one flat array of 4-byte
+floats. save_weights writes that array to a file, and load_weights can memory-map the file read-only so any number
+of worker processes share one copy through the operating system instead of each loading its own.
+
+To Run: python3 N_Tuple.py train --games 2000 --weights weights.ntuple
+        python3 N_Tuple.py play --games 1000 --weights weights.ntuple
+
+Abstraction Reference Guide:
+
+    PATTERNS        - named sets of tuples (each tuple is a list of y*4 + x space numbers)
+    make_weights    - creates an all-zero flat weight array for the given tuples
+    save_weights    - writes the tuples and weights to a file
+    load_weights    - reads a weights file (memory-mapped read-only by default) and returns (tuples, weights)
+    evaluate        - returns the learned value of a bitboard
+    choose_move     - returns (direction, afterstate, reward) for the swipe with the best reward + value or None
+    train           - plays games, learning after every move, and reports games/second and updates/second
+    play_games      - plays games with the learned values across a pool of workers that all map the same file
+    main            - reads the command line and runs train or play
+
+"""
+
+from array import array
+import argparse
+import json
+import mmap
+import multiprocessing
+import os
+import struct
+import time
+
+from Move_Tables import swipe
+from Staff_Solution import make_rng
+
+DIRECTIONS = ("left", "right", "up", "down");
+MAGIC = b"NTUPLE01";
+
+PATTERNS = {
+    #The 4 rows and 4 columns
+    "lines": [[y*4 + x for x in range(4)] for y in range(4)] + [[y*4 + x for y in range(4)] for x in range(4)],
+
+    #The lines plus four 2 x 3 blocks (16^6 entries each, so this set needs about 270 MB)
+    "blocks": ([[y*4 + x for x in range(4)] for y in range(4)] + [[y*4 + x for y in range(4)] for x in range(4)] +
+               [[0, 1, 2, 4, 5, 6], [4, 5, 6, 8, 9, 10], [1, 2, 3, 5, 6, 7], [5, 6, 7, 9, 10, 11]])
+};
+
+
+def _offsets(tuples):
+    #Returns the position of every tuple's table in the flat array and the total length of the array
+    offsets = [];
+    total = 0;
+    for cells in tuples:
+        offsets.append(total);
+        total += 16 ** len(cells);
+    return (offsets, total);
+
+
+def make_weights(tuples):
+    #Returns a flat array of zeros with one 4-byte float for every entry of every tuple's table
+    #Arg tuples: list - lists of space numbers (y*4 + x)
+
+    offsets, total = _offsets(tuples);
+    return array('f', bytes(4 * total));
+
+
+def save_weights(path, tuples, weights):
+    #Writes the tuples and the flat weight array to the file at the given path
+    #File layout: MAGIC, a 4-byte header length, the tuples as JSON (padded to a multiple of 4 bytes), then the floats
+    #Arg path: string - file to write
+    #Arg tuples: list - the tuples the weights belong to
+    #Arg weights: array - the flat weight array
+
+    header = json.dumps(tuples).encode();
+    header += b" " * (-len(header) % 4);
+    with open(path, "wb") as out:
+        out.write(MAGIC);
+        out.write(struct.pack("<I", len(header)));
+        out.write(header);
+        out.write(weights.tobytes());
+
+
+def load_weights(path, writable=False):
+    #Returns a (tuples, weights) tuple read from a file written by save_weights
+    #Read-only weights are a memory-mapped view of the file (shared by every process that maps it) and writable
+    #weights are a private array copy that training can change
+    #Arg path: string - file to read
+    #Arg writable: boolean (optional) - True to get a private copy that can be trained further
+
+    with open(path, "rb") as source:
+        assert source.read(len(MAGIC)) == MAGIC, "Not an N-tuple weights file";
+        header_length = struct.unpack("<I", source.read(4))[0];
+        tuples = json.loads(source.read(header_length).decode());
+        start = len(MAGIC) + 4 + header_length;
+
+        if writable:
+            weights = array('f');
+            weights.frombytes(source.read());
+        else:
+            mapped = mmap.mmap(source.fileno(), 0, access=mmap.ACCESS_READ);
+            weights = memoryview(mapped)[start:].cast('f');
+
+    offsets, total = _offsets(tuples);
+    assert len(weights) == total, "Weights file is the wrong size for its tuples";
+    return (tuples, weights);
+
+
+#_offsets results for the tuples lists in use, by id (the list is kept too so its id can't be reused)
+OFFSETS = {};
+
+def _indexes(tuples, bitboard):
+    #Returns the position in the flat array of the entry every tuple uses for this bitboard
+    saved = OFFSETS.get(id(tuples));
+    if saved == None or saved[0] is not tuples:
+        saved = OFFSETS[id(tuples)] = (tuples, _offsets(tuples)[0]);
+    offsets = saved[1];
+    indexes = [];
+    for i in range(len(tuples)):
+        index = 0;
+        shift = 0;
+        for cell in tuples[i]:
+            index |= ((bitboard >> (4 * cell)) & 0xF) << shift;
+            shift += 4;
+        indexes.append(offsets[i] + index);
+    return indexes;
+
+
+def evaluate(tuples, weights, bitboard):
+    #Returns the learned value of the bitboard (the sum of every tuple's table entry)
+    #Arg tuples: list - the tuples the weights belong to
+    #Arg weights: array - the flat weight array
+    #Arg bitboard: integer - the position to value
+
+    value = 0.0;
+    for index in _indexes(tuples, bitboard):
+        value += weights[index];
+    return value;
+
+
+def choose_move(tuples, weights, bitboard):
+    #Returns a (direction, afterstate, reward) tuple for the swipe with the highest reward + value of the board it leaves
+    #(before the new piece is added), or None if no swipe changes the board
+    #Arg tuples: list - the tuples the weights belong to
+    #Arg weights: array - the flat weight array
+    #Arg bitboard: integer - the position to pick a swipe for
+
+    best = None;
+    best_value = 0.0;
+    for direction in DIRECTIONS:
+        afterstate, reward = swipe(direction, bitboard);
+        if afterstate == bitboard:
+            continue;
+
+        value = reward + evaluate(tuples, weights, afterstate);
+        if best == None or value > best_value:
+            best = (direction, afterstate, reward);
+            best_value = value;
+
+    return best;
+
+
+def _spawn(bitboard, rng):
+    #Adds a 2 (60%), 4 (37%) or 8 (3%) to a random empty space of the bitboard, using two random numbers like place_random
+    generated = rng.random() * 100;
+    piece = 1 if generated < 60 else (2 if generated < 97 else 3);
+
+    empty = [cell for cell in range(16) if (bitboard >> (4 * cell)) & 0xF == 0];
+    cell = empty[int(rng.random() * len(empty))];
+    return bitboard | (piece << (4 * cell));
+
+
+def _update(tuples, weights, afterstate, error):
+    #Moves every table entry used by the afterstate by the same share of the error
+    for index in _indexes(tuples, afterstate):
+        weights[index] += error;
+
+
+def train(tuples, weights, games, alpha=.01, seed=None, report_every=100):
+    #Plays the given number of games, learning from every move with TD(0) on afterstates, and prints progress
+    #Returns a dictionary with games, moves, updates, average score and seconds
+    #Arg tuples: list - the tuples the weights belong to
+    #Arg weights: array - a writable flat weight array
+    #Arg games: integer - number of training games
+    #Arg alpha: float - learning rate (split evenly across the tuples)
+    #Arg seed: any number or string (optional) - seed for the spawns
+    #Arg report_every: integer - print a progress line after this many games
+
+    rng = make_rng(seed);
+    step = alpha / len(tuples);
+    start = time.perf_counter();
+    moves = 0;
+    updates = 0;
+    total_score = 0;
+    recent_score = 0;
+
+    for game in range(games):
+        bitboard = _spawn(_spawn(0, rng), rng);
+        score = 0;
+        previous = None;
+
+        while True:
+            chosen = choose_move(tuples, weights, bitboard);
+
+            #Learn: the afterstate we left last move should be worth what this move earns plus where it leads
+            if previous != None:
+                target = 0.0 if chosen == None else chosen[2] + evaluate(tuples, weights, chosen[1]);
+                _update(tuples, weights, previous, step * (target - evaluate(tuples, weights, previous)));
+                updates += 1;
+
+            if chosen == None:
+                break;
+
+            direction, afterstate, reward = chosen;
+            score += reward;
+            moves += 1;
+            previous = afterstate;
+            bitboard = _spawn(afterstate, rng);
+
+        total_score += score;
+        recent_score += score;
+
+        if (game + 1) % report_every == 0 or game + 1 == games:
+            seconds = max(time.perf_counter() - start, 1e-9);
+            print("Games: " + str(game + 1) + " -- Recent average score: " + str(int(recent_score / ((game % report_every) + 1))) +
+                  " -- Games/second: " + "%.1f" % ((game + 1) / seconds) + " -- Updates/second: " + "%.0f" % (updates / seconds));
+            recent_score = 0;
+
+    seconds = time.perf_counter() - start;
+    return {"games": games, "moves": moves, "updates": updates, "average_score": total_score / max(games, 1), "seconds": seconds};
+
+
+#Every worker process of play_games maps the weights file once, when it starts
+WORKER_WEIGHTS = {};
+
+def _start_worker(path):
+    WORKER_WEIGHTS["tuples"], WORKER_WEIGHTS["weights"] = load_weights(path);
+
+
+def _play_one(seed):
+    #Plays one greedy game with the worker's mapped weights and returns (seed, score, max tile, moves)
+    tuples, weights = WORKER_WEIGHTS["tuples"], WORKER_WEIGHTS["weights"];
+    rng = make_rng(seed);
+    bitboard = _spawn(_spawn(0, rng), rng);
+    score = 0;
+    moves = 0;
+    while True:
+        chosen = choose_move(tuples, weights, bitboard);
+        if chosen == None:
+            break;
+        score += chosen[2];
+        moves += 1;
+        bitboard = _spawn(chosen[1], rng);
+
+    max_tile = max((bitboard >> (4 * cell)) & 0xF for cell in range(16));
+    return (seed, score, 1 << max_tile, moves);
+
+
+def play_games(path, games, seed=0, workers=None):
+    #Plays games with the learned values in a pool of worker processes that all memory-map the same weights file
+    #Returns the list of (seed, score, max tile, moves) results
+    #Arg path: string - weights file written by save_weights
+    #Arg games: integer - number of games
+    #Arg seed: integer - game i is played with seed + i
+    #Arg workers: integer (optional) - worker processes (one per core if not given)
+
+    with multiprocessing.Pool(workers or os.cpu_count() or 1, _start_worker, (path,)) as pool:
+        return list(pool.imap_unordered(_play_one, range(seed, seed + games), 16));
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Trains and plays an N-tuple network for 4 x 4 2048");
+    parser.add_argument("command", choices=["train", "play"]);
+    parser.add_argument("--weights", default="weights.ntuple", help="weights file to read/write");
+    parser.add_argument("--patterns", choices=sorted(PATTERNS), default="lines", help="tuples for a new network");
+    parser.add_argument("--games", type=int, default=1000);
+    parser.add_argument("--alpha", type=float, default=.01, help="learning rate");
+    parser.add_argument("--seed", type=int, default=None);
+    parser.add_argument("--workers", type=int, default=None, help="worker processes for play");
+    options = parser.parse_args();
+
+    if options.command == "train":
+        if os.path.exists(options.weights):
+            tuples, weights = load_weights(options.weights, writable=True);
+        else:
+            tuples = PATTERNS[options.patterns];
+            weights = make_weights(tuples);
+
+        train(tuples, weights, options.games, options.alpha, options.seed);
+        save_weights(options.weights, tuples, weights);
+        print("Saved " + str(len(weights)) + " weights to " + options.weights);
+
+    else:
+        start = time.perf_counter();
+        results = play_games(options.weights, options.games, options.seed or 0, options.workers);
+        seconds = max(time.perf_counter() - start, 1e-9);
+        moves = sum(result[3] for result in results);
+        print("Games: " + str(len(results)) + " -- Average score: " + str(int(sum(result[1] for result in results) / len(results))) +
+              " -- Best tile: " + str(max(result[2] for result in results)));
+        print("Games/second: " + "%.1f" % (len(results) / seconds) + " -- Moves/second: " + "%.0f" % (moves / seconds));
+
+
+if __name__ == "__main__":
+    main();
@@ -35,14 +35,34 @@ Abstraction Reference Guide:
     main            - responsible for starting the game and directing control to each function and/or tests
         board       - a variable within main that contains the current board and is passed to most functions as an argument
 
+    Pieces:
+        Every piece on the board is an integer exponent - EMPTY (0) is an empty space, 1 is a 2, 2 is a 4, 3 is an 8 and so on
+        (combining two pieces just adds 1). They are only turned into '*', '2', '4', ... strings when the board is printed
+
     System Functions:
         get_key_press   - returns the user's key_press input as an ascii value
+        make_rng        - returns a new random number generator for one game (the same seed always plays out the same way)
+        spawn_stream    - draws the random numbers for a number of spawns ahead of time and returns them as a SpawnStream
         clear           - clears the screen (should be called before each print_board call)
+        draw_board      - draws the board at the top of the screen, only rewriting the spaces that changed since the last draw
         pause           - a function used by the GUI to allow for a slight delay that is more visually appealing in placing the new piece
+        start_keys      - puts the terminal in a mode where key presses can be waited for with a time limit (stop_keys undoes it)
+        key_ready       - waits up to the given number of seconds for a key press and returns True if one is waiting
+        decode_keys     - turns typed text into key names ("up", "down", "left", "right", "q", " ", ...), escape sequences included
+        read_keys       - waits for key presses, then reads everything typed so far at once and adds it to KEY_QUEUE
 
 
     Board Functions:
         make_board      - creates a new, empty square board of argument N x N dimension
+        copy_board      - returns an independent copy of the argument board (keeping its empty space counts)
+        build_empty_tree - returns the Fenwick tree counting a board's empty spaces (see Board)
+        find_empty      - returns the (x, y) of the k-th empty space counting row by row from the top left
+        zobrist_key     - returns the 64-bit number a piece at a space adds to a board's Zobrist hash
+        board_hash      - returns the 64-bit Zobrist hash of a board (kept up to date by place_piece if make_board was asked to)
+        piece_to_string - turns a piece into the text shown on screen ('*' for EMPTY, '2' for 1, '4' for 2, ...)
+        string_to_piece - turns '*', '2', '4', ... text back into a piece
+        piece_glyph     - returns the colored text a piece is shown as on screen
+        board_lines     - returns the lines of text print_board shows for the argument board
         print_board     - prints out the state of the argument board
         board_full      - returns True if the board is full and False otherwise
 
@@ -58,9 +78,21 @@ Abstraction Reference Guide:
         get_piece       - gets the piece from the given board at the given (x,y) coordinates or returns None if the position is invalid
         place_piece     - places the given piece on the given board at the given (x,y) coordinates and returns True or returns False if the position is invalid
         place_random    - user implemented function which places a random 2 OR 4 OR 8 in an empty part of the board
+                          (takes an optional rng, and always uses exactly one number for the piece and one for the position)
         have_lost       - responsible for determining if the game has been lost yet (no moves remain)
+        can_move        - returns True if swiping the board in the given direction would change it
         move_possible   - responsible for determining if a move is possible from a single position
         move            - responsible for moving a piece, at the given (x,y) coordinates in the given direction on the given board
+        schedule_frame  - asks for the board to be drawn once a number of seconds have passed (used by end_move for the new piece)
+        run_animation   - draws the scheduled board when it is due, or as soon as a key is pressed (see ANIMATIONS)
+
+    Headless Engine (no printing, clearing or pausing - used by bots, analytics and the swipe functions):
+        slide           - slides every piece on the board in the given direction and returns (changed, merges)
+        compact_line    - the "compact" kernel for slide: slides one row or column in place in a single loop (no recursion)
+        play_move       - slides the board in the given direction and places a random piece, returning (changed, merges, spawn)
+        slide_line      - returns a slid copy of a single row or column (a list of pieces) without touching the board
+        preview_moves   - returns the legal directions and the board each of them would lead to, without changing the board
+        autoplay        - hands control of the board to the expectimax AI (Expectimax.py) until the game is lost
 
 """
 
@@ -68,9 +100,19 @@ Abstraction Reference Guide:
 import getch
 #Installed via 'python3 -m pip install termcolor'
 import termcolor
+import argparse
+from collections import deque
 import random
 import os
+import select
+import shutil
+import sys
 import time
+#Only on Macs and Linux (without it, key_ready just waits)
+try:
+    import termios
+except ImportError:
+    termios = None;
 
 def get_key_press():
     #Utility function that gets which key was pressed and translates it into its character ascii value
@@ -86,6 +128,9 @@ def clear():
         #For Windows
         os.system('cls');
 
+    #Whatever draw_board drew last is gone now
+    SCREEN["pieces"] = None;
+
 
 def pause(seconds):
     #Utility function that pauses for the given amount of time
@@ -94,58 +139,489 @@ def pause(seconds):
     time.sleep(seconds);
 
 
-def make_board(N):
-    #Utility function that returns a new N x N empty board (empty spaces represented by '*')
+#The terminal settings start_keys replaced (None when the terminal is as it was)
+TERMINAL = {"saved": None};
+
+def start_keys():
+    #Utility function that stops the terminal from holding key presses back until enter is pressed (and from echoing them),
+    #so key_ready can see them straight away - call stop_keys to put the terminal back
+    if termios == None or TERMINAL["saved"] != None or not sys.stdin.isatty():
+        return;
+
+    saved = termios.tcgetattr(sys.stdin);
+    changed = termios.tcgetattr(sys.stdin);
+    changed[3] = changed[3] & ~(termios.ICANON | termios.ECHO);
+    changed[6][termios.VMIN] = 1;
+    changed[6][termios.VTIME] = 0;
+    #TCSANOW keeps anything already typed
+    termios.tcsetattr(sys.stdin, termios.TCSANOW, changed);
+    TERMINAL["saved"] = saved;
+
+
+def stop_keys():
+    #Utility function that puts the terminal back the way it was before start_keys
+    if TERMINAL["saved"] != None:
+        termios.tcsetattr(sys.stdin, termios.TCSANOW, TERMINAL["saved"]);
+        TERMINAL["saved"] = None;
+
+
+def key_ready(seconds):
+    #Utility function that waits until a key press is waiting to be read or the given number of seconds pass
+    #Returns True if a key press is waiting and False if the time ran out
+    #Arg seconds: a float or integer - most seconds to wait
+
+    seconds = max(0, seconds);
+    if TERMINAL["saved"] == None:
+        pause(seconds);
+        return False;
+
+    return len(select.select([sys.stdin], [], [], seconds)[0]) > 0;
+
+
+#Names of the keys that send escape sequences (terminals send either the "[" or the "O" version of the arrows)
+KEY_NAMES = {
+    "\x1b[A": "up",    "\x1bOA": "up",
+    "\x1b[B": "down",  "\x1bOB": "down",
+    "\x1b[C": "right", "\x1bOC": "right",
+    "\x1b[D": "left",  "\x1bOD": "left",
+    "\r": "enter",     "\n": "enter",
+    "\x1b": "escape"
+};
+
+#Key presses read by read_keys that haven't been handled yet, oldest first, as (time.perf_counter() time, key name) tuples
+KEY_QUEUE = deque();
+
+#Longest to wait for the rest of an escape sequence before deciding escape was pressed on its own
+ESCAPE_WAIT = .05;
+
+def decode_keys(text, finished=False):
+    #Utility function that splits typed text into key names - arrows become "up", "down", "left", "right", enter is
+    #"enter", escape on its own is "escape" and any other key is just its character ("q", "a", " ", "A", ...)
+    #Returns a (keys, leftover) tuple - leftover is the start of an escape sequence cut off at the end of the text
+    #Arg text: string - the characters read from the keyboard
+    #Arg finished: boolean (optional) - True if nothing more is coming, so a cut off escape sequence is decoded as it is
+
+    keys = [];
+    i = 0;
+    while i < len(text):
+        if text[i] != "\x1b":
+            keys.append(KEY_NAMES.get(text[i], text[i]));
+            i += 1;
+            continue;
+
+        #Escape sequences are escape, "[" or "O", any numbers and ";"s and then one final letter
+        end = i + 1;
+        if end < len(text) and text[end] in "[O":
+            end += 1;
+            while end < len(text) and text[end] in "0123456789;":
+                end += 1;
+            if end < len(text):
+                end += 1;
+            elif not finished:
+                return (keys, text[i:]);
+        elif end == len(text) and not finished:
+            return (keys, text[i:]);
+
+        sequence = text[i:end];
+        if sequence in KEY_NAMES:
+            keys.append(KEY_NAMES[sequence]);
+        elif len(sequence) == 2:
+            #Escape followed by a normal key (alt + key on most terminals) counts as both keys
+            keys.append("escape");
+            keys.append(KEY_NAMES.get(sequence[1], sequence[1]));
+        #Any other escape sequence (function keys, page up, ...) is thrown away
+        i = end;
+
+    return (keys, "");
+
+
+def read_keys(seconds=None):
+    #Utility function that waits up to the given number of seconds (forever if None) for a key press, then reads
+    #everything typed so far with a single read and adds every key in it to the end of KEY_QUEUE
+    #Returns the number of keys added
+    #Arg seconds: a float or integer (optional) - most seconds to wait
+
+    #Without start_keys (or on Windows), fall back on reading one key at a time with get_key_press
+    if TERMINAL["saved"] == None:
+        text = chr(get_key_press());
+        if text == "\x1b":
+            text += chr(get_key_press()) + chr(get_key_press());
+        keys = decode_keys(text, True)[0];
+        now = time.perf_counter();
+        KEY_QUEUE.extend((now, key) for key in keys);
+        return len(keys);
+
+    descriptor = sys.stdin.fileno();
+    text = "";
+    if len(select.select([descriptor], [], [], seconds)[0]) > 0:
+        text = os.read(descriptor, 1024).decode(errors="replace");
+    now = time.perf_counter();
+
+    keys, leftover = decode_keys(text);
+
+    #An escape sequence cut off by the read is finished by the next one, unless nothing comes (then it was just escape)
+    while leftover != "" and len(select.select([descriptor], [], [], ESCAPE_WAIT)[0]) > 0:
+        more, leftover = decode_keys(leftover + os.read(descriptor, 1024).decode(errors="replace"));
+        keys += more;
+    if leftover != "":
+        keys += decode_keys(leftover, True)[0];
+
+    KEY_QUEUE.extend((now, key) for key in keys);
+    return len(keys);
+
+
+def make_rng(seed=None):
+    #Utility function that returns a new random number generator - pass it as the rng argument of place_random,
+    #swap, play_move, ... so a game only depends on its own seed (the random module itself is used when no rng is given)
+    #Arg seed: any number or string (optional) - the same seed always gives the same random numbers
+
+    return random.Random(seed);
+
+
+class SpawnStream:
+    #A list of random numbers drawn ahead of time that can be used anywhere an rng is expected (it hands them out in order)
+    #Every spawn uses exactly two numbers, so spawn k always uses numbers 2k and 2k+1 no matter how the game is played
+
+    def __init__(self, numbers):
+        self.numbers = numbers;
+        self.used = 0;
+
+    def random(self):
+        number = self.numbers[self.used];
+        self.used += 1;
+        return number;
+
+
+def spawn_stream(rng, count):
+    #Utility function that draws the numbers for the next count spawns from rng all at once and returns them as a SpawnStream
+    #Arg rng: random number generator - usually made by make_rng
+    #Arg count: integer - number of spawns to draw for
+
+    return SpawnStream([rng.random() for i in range(2 * count)]);
+
+
+#The piece stored in an empty space
+EMPTY = 0;
+
+def piece_to_string(piece):
+    #Utility function that returns the text for the given piece ('*' for EMPTY, otherwise 2 to the power of the piece)
+    #Arg piece: integer - the piece you want to show
+
+    if piece == EMPTY:
+        return '*';
+
+    return str(1 << piece);
+
+
+def string_to_piece(text):
+    #Utility function that returns the piece for the given text ('*' is EMPTY, '2' is 1, '4' is 2, '8' is 3, ...)
+    #Arg text: string - the text you want to convert
+
+    if text == '*':
+        return EMPTY;
+
+    value = int(text);
+    piece = value.bit_length() - 1;
+    assert value >= 2 and value == 1 << piece, "Pieces must be powers of two";
+    return piece;
+
+
+class Board(list):
+    #A board is still a list of rows (board[y][x] is the piece at (x,y)), it just also keeps count of its empty spaces:
+    #   empty_count - number of empty spaces on the whole board
+    #   empty_tree  - Fenwick (binary indexed) tree over the N*N spaces in row-major order, 1 for every empty one, so
+    #                 the k-th empty space can be found in O(log N) steps (find_empty) and one space changes in O(log N)
+    #   move_counts - dictionary from each direction to the number of neighbouring pairs that would change in that direction
+    #   zobrist     - (only if make_board was asked for it) the board's Zobrist hash - see board_hash
+    #place_piece keeps all of these up to date, which lets place_random, board_full, can_move, have_lost and board_hash
+    #work without looking at the whole board
+    pass;
+
+
+#zobrist_key numbers already worked out, by (space, piece)
+ZOBRIST_KEYS = {};
+
+def zobrist_key(cell, piece):
+    #Utility function that returns the 64-bit number the piece at space number cell (y*N + x) adds to a Zobrist hash
+    #The numbers are mixed from (cell, piece) alone, so they are the same in every process and every run
+    #Arg cell: integer - y*N + x
+    #Arg piece: integer - the piece at that space (EMPTY always gives 0)
+
+    if piece == EMPTY:
+        return 0;
+
+    key = ZOBRIST_KEYS.get((cell, piece));
+    if key == None:
+        #SplitMix64 scrambling of the (cell, piece) pair
+        mixed = (cell * 0x10000 + piece + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF;
+        mixed = ((mixed ^ (mixed >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF;
+        mixed = ((mixed ^ (mixed >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF;
+        key = ZOBRIST_KEYS[(cell, piece)] = mixed ^ (mixed >> 31);
+
+    return key;
+
+
+def board_hash(board):
+    #Utility function that returns the 64-bit Zobrist hash of the board (all of its zobrist_key numbers XORed together)
+    #Boards made with make_board(N, zobrist=True) already know it - any other board has to be walked through
+    #Arg board: board - the board you want to hash
+
+    if hasattr(board, "zobrist"):
+        return board.zobrist;
+
+    N = len(board);
+    hashed = 0;
+    for y in range(N):
+        for x in range(N):
+            hashed ^= zobrist_key(y*N + x, board[y][x]);
+    return hashed;
+
+
+def make_board(N, zobrist=False):
+    #Utility function that returns a new N x N empty board (empty spaces represented by EMPTY)
     #Arg N: integer - board dimensions
+    #Arg zobrist: boolean (optional) - if True, the board carries a Zobrist hash that place_piece keeps up to date
 
     assert N >= 1, "Invalid board dimension";
     assert type(N) == int, "N must be an integer";
-    return [["*" for x in range(N)] for x in range(N)];
+    board = Board([EMPTY for x in range(N)] for x in range(N));
+    board.empty_count = N * N;
+    board.empty_tree = build_empty_tree(board);
+    board.move_counts = {"left": 0, "right": 0, "up": 0, "down": 0};
+    if zobrist:
+        board.zobrist = 0;
+    return board;
+
+
+def copy_board(board):
+    #Utility function that returns a copy of the board which can be changed without changing the original
+    #Arg board: board - the board you want to copy
+
+    copy = Board(row[:] for row in board);
+    if hasattr(board, "empty_tree"):
+        copy.empty_count = board.empty_count;
+        copy.empty_tree = board.empty_tree[:];
+        copy.move_counts = dict(board.move_counts);
+        if hasattr(board, "zobrist"):
+            copy.zobrist = board.zobrist;
+    else:
+        N = len(board);
+        copy.empty_count = sum(row.count(EMPTY) for row in board);
+        copy.empty_tree = build_empty_tree(copy);
+        copy.move_counts = {"left": 0, "right": 0, "up": 0, "down": 0};
+        for y in range(N):
+            for x in range(N):
+                track_pairs(x, y, copy, 1, True);
+    return copy;
+
+
+def build_empty_tree(board):
+    #Utility function that returns the Fenwick tree of the board's empty spaces (see Board) in O(N*N) steps
+    #tree[i] counts the empty spaces numbered i - (i & -i) + 1 up to i, where space y*N + x is numbered y*N + x + 1
+    #Arg board: board - the board whose empty spaces are counted
+
+    N = len(board);
+    tree = [0] * (N * N + 1);
+    for y in range(N):
+        for x in range(N):
+            i = y*N + x + 1;
+            tree[i] += (board[y][x] == EMPTY);
+            parent = i + (i & -i);
+            if parent <= N * N:
+                tree[parent] += tree[i];
+    return tree;
+
+
+def find_empty(k, board):
+    #Utility function that returns the (x, y) of the k-th empty space (k = 0 is the first), counting row by row from the
+    #top left - O(log N) steps on a board made by make_board, a walk over the board otherwise
+    #Arg k: integer - which empty space, 0 <= k < number of empty spaces
+    #Arg board: board - the board to look in
+
+    N = len(board);
+
+    if not hasattr(board, "empty_tree"):
+        for y in range(N):
+            for x in range(N):
+                if board[y][x] == EMPTY:
+                    if k == 0:
+                        return (x, y);
+                    k -= 1;
+        assert False, "There aren't that many empty spaces";
+
+    #Walk down the tree, taking every block of spaces that holds no more than k empty ones
+    tree = board.empty_tree;
+    space = 0;
+    step = 1 << (N * N).bit_length();
+    while step > 0:
+        if space + step <= N * N and tree[space + step] <= k:
+            space += step;
+            k -= tree[space];
+        step >>= 1;
+
+    return (space % N, space // N);
+
+
+def pair_moves(first, second):
+    #Utility function that looks at two neighbouring pieces (first is on the left/top, second on the right/bottom)
+    #Returns a (towards_first, towards_second) tuple saying whether swiping towards each of them would change the pair
+    #Arg first: integer - the left or upper piece
+    #Arg second: integer - the right or lower piece
+
+    towards_first = second != EMPTY and (first == EMPTY or first == second);
+    towards_second = first != EMPTY and (second == EMPTY or first == second);
+    return (towards_first, towards_second);
+
+
+def track_pairs(x, y, board, amount, forward_only=False):
+    #Utility function that adds amount (1 or -1) to board.move_counts for every neighbouring pair around (x,y) that can move
+    #Arg x: integer - x coordinate
+    #Arg y: integer - y coordinate
+    #Arg board: board - a board made by make_board
+    #Arg amount: integer - 1 to count the pairs, -1 to uncount them
+    #Arg forward_only: boolean (optional) - only look at the right and lower pairs (so a full-board walk counts each pair once)
+
+    N = len(board);
+    counts = board.move_counts;
+    piece = board[y][x];
+
+    if x + 1 < N:
+        left, right = pair_moves(piece, board[y][x+1]);
+        if left:    counts["left"] += amount;
+        if right:   counts["right"] += amount;
+    if y + 1 < N:
+        up, down = pair_moves(piece, board[y+1][x]);
+        if up:      counts["up"] += amount;
+        if down:    counts["down"] += amount;
+
+    if forward_only:
+        return;
+
+    if x > 0:
+        left, right = pair_moves(board[y][x-1], piece);
+        if left:    counts["left"] += amount;
+        if right:   counts["right"] += amount;
+    if y > 0:
+        up, down = pair_moves(board[y-1][x], piece);
+        if up:      counts["up"] += amount;
+        if down:    counts["down"] += amount;
+
+
+#COLORS[piece] is the color of that piece ('*', '2', '4', ... '4096') - bigger pieces go around the colors again,
+#each time round with the next set of ATTRIBUTES so that every piece still looks different
+COLORS = [None, 'red', 'green', 'yellow', 'blue', 'magenta', 'cyan', 'grey', 'white', 'green', 'red', 'blue', 'magenta'];
+ATTRIBUTES = [[], ['bold'], ['underline'], ['reverse'], ['bold', 'underline'], ['bold', 'reverse'], ['underline', 'reverse']];
+
+#Lines printed above the board (each kept well under 80 characters so none of them wraps onto a second screen line,
+#which draw_board relies on to know which screen line every row of the board is on)
+HEADER_LINES = ["Use the arrows keys to play 2048!", "Press a for autoplay -- Press t to test -- Press q to quit"];
+HEADER = "\n".join(HEADER_LINES);
+
+#GLYPHS[piece] is the colored text for that piece, made the first time it is needed
+GLYPHS = [];
+
+def piece_glyph(piece):
+    #Utility function that returns the colored text a piece is shown as on screen (worked out once per piece)
+    #Arg piece: integer - the piece you want to show
+
+    while len(GLYPHS) <= piece:
+        new_piece = len(GLYPHS);
+        if new_piece < len(COLORS):
+            GLYPHS.append(termcolor.colored(piece_to_string(new_piece), COLORS[new_piece]));
+        else:
+            color = COLORS[1 + (new_piece - 1) % (len(COLORS) - 1)];
+            attributes = ATTRIBUTES[((new_piece - 1) // (len(COLORS) - 1)) % len(ATTRIBUTES)];
+            GLYPHS.append(termcolor.colored(piece_to_string(new_piece), color, attrs=attributes));
+
+    return GLYPHS[piece];
+
+
+#Text of every row shown recently, by the row's pieces (emptied when it holds ROW_CACHE_SIZE rows)
+ROW_TEXT = {};
+ROW_CACHE_SIZE = 4096;
+
+def board_lines(board):
+    #Utility function that returns the lines of text print_board shows for the board (without the header)
+    #Arg board: board - the board you want to show
+
+    N = len(board);
+    vertical_edge = "-\t" * (N+2);
+    lines = [vertical_edge];
+    for y in range(N):
+        key = tuple(board[y]);
+        text = ROW_TEXT.get(key);
+        if text == None:
+            if len(ROW_TEXT) >= ROW_CACHE_SIZE:
+                ROW_TEXT.clear();
+            text = ROW_TEXT[key] = "|\t" + "".join(piece_glyph(piece) + "\t" for piece in key) + "|";
+        lines.append(text);
+        if y is not N-1: lines.append("");
+    lines.append(vertical_edge);
+    return lines;
 
 
 def print_board(board):
     #Utility function that prints out the state of the board
     #Arg board: board - the board you want to print
-    colors = {
-        '*': None,
-        '2': 'red',
-        '4': 'green',
-        '8': 'yellow',
-        '16': 'blue',
-        '32': 'magenta',
-        '64': 'cyan',
-        '128': 'grey',
-        '256': 'white',
-        '512': 'green',
-        '1024': 'red',
-        '2048': 'blue',
-        '4096': 'magenta'
-    };
-
-    header = "Use the arrows keys to play 2048! -- Press t to test -- Press q to quit";
-    print(header);
+
+    print(HEADER + "\n" + "\n".join(board_lines(board)));
+
+
+#What draw_board last put on the screen: a copy of the pieces of every row (None if the screen has to be redrawn)
+SCREEN = {"pieces": None};
+
+#Every space is one tab stop (8 columns) wide, so its text can be rewritten in place as long as it fits in 7
+CELL_WIDTH = 7;
+
+def draw_board(board):
+    #Utility function that shows the board at the top of the screen like clear() + print_board(board), but only
+    #rewrites the spaces whose piece changed since the last call (moving the cursor to them with ANSI escape codes),
+    #all in a single write - so no shell is started and a swipe costs about as much as the number of changed spaces
+    #Arg board: board - the board you want to show
+
     N = len(board);
-    vertical_edge = "";
-    for i in range(N+2):
-        vertical_edge += "-\t";
-    print(vertical_edge);
-    for y in range(N):
-        row = "";
-        for x in board[y]:
-            row += termcolor.colored(x, colors[x]);
-            row += "\t";
-        print("|\t" + row + "|");
-        if y is not N-1: print("")
-    print(vertical_edge);
+    previous = SCREEN["pieces"];
+    widest = max(len(piece_to_string(piece)) for row in board for piece in row);
+
+    #A board wider than the terminal wraps, so its spaces aren't where the cursor moves below expect them to be
+    wraps = 8*(N+1) + 1 > shutil.get_terminal_size().columns;
+
+    if previous == None or len(previous) != N or widest > CELL_WIDTH or wraps:
+        #Nothing to compare against (or a piece too wide to rewrite in place): draw everything from the top left corner
+        frame = "\x1b[H\x1b[2J" + HEADER + "\n" + "\n".join(board_lines(board)) + "\n";
+    else:
+        frame = "";
+        top = len(HEADER_LINES) + 2;
+        for y in range(N):
+            for x in range(N):
+                piece = board[y][x];
+                if piece == previous[y][x]:
+                    continue;
+
+                #After the header and the top edge, row y is on screen line top + 2y and space x starts at
+                #column 8(x+1) + 1 (lines and columns count from 1)
+                padding = " " * max(0, len(piece_to_string(previous[y][x])) - len(piece_to_string(piece)));
+                frame += "\x1b[" + str(top + 2*y) + ";" + str(8*(x+1) + 1) + "H" + piece_glyph(piece) + padding;
+
+        #Leave the cursor on the line under the board and wipe anything printed below it since the last draw
+        frame += "\x1b[" + str(top + 2*N) + ";1H\x1b[J";
+
+    SCREEN["pieces"] = [row[:] for row in board] if widest <= CELL_WIDTH and not wraps else None;
+    sys.stdout.write(frame);
+    sys.stdout.flush();
 
 
 def board_full(board):
     #Utility function that returns True if the given board is full and False otherwise
     #Arg board: board - the board you want to check
 
+    #Boards made by make_board know how many empty spaces they have
+    if hasattr(board, "empty_count"):
+        return board.empty_count == 0;
+
     for row in board:
         for piece in row:
-            if piece == '*':  return False;
+            if piece == EMPTY:  return False;
 
     return True;
 
@@ -159,7 +635,7 @@ def move_possible(x, y, board):
     piece_at_xy = get_piece(x, y, board);
     if piece_at_xy == None:
         return False;
-    elif piece_at_xy == '*':    #An empty space means a move is always possible
+    elif piece_at_xy == EMPTY:  #An empty space means a move is always possible
         return True;
 
     return (
@@ -170,18 +646,19 @@ def move_possible(x, y, board):
            );
 
 
-def move(x, y, direction, board):
+def move(x, y, direction, board, merges=None):
     #Utility function that moves the piece at the position (x,y) on the given board the given direction
     #Returns whether an action was actually executed or not
     #Arg x: integer - x coordinate
     #Arg y: integer - y coordinate
     #Arg direction: string - "left", "right", "up", "down"
     #Arg board: board - the board you wish to make a move on
+    #Arg merges: list (optional) - if given, an (x, y, piece) tuple is appended for every combination made
 
 
     piece_at_xy = get_piece(x, y, board);                   #Getting necessary pieces
 
-    assert piece_at_xy != '*', "Error in swipe logic";      #Logical debug case
+    assert piece_at_xy != EMPTY, "Error in swipe logic";    #Logical debug case
     valid_direction = (direction == "left"  or
                        direction == "right" or
                        direction == "up"    or
@@ -197,19 +674,21 @@ def move(x, y, direction, board):
     if adjacent[0] == None:                                             #Edge of the board case (no action taken)
         return False;
 
-    elif piece_at_xy != adjacent[0] and adjacent[0] != '*':             #Can't combine two numbers case (no action taken)
+    elif piece_at_xy != adjacent[0] and adjacent[0] != EMPTY:           #Can't combine two numbers case (no action taken)
         return False;
 
-    elif adjacent[0] == '*':                                            #Empty spot adjacent case (recursive movement in direction)
-        place_piece('*', x, y, board);
+    elif adjacent[0] == EMPTY:                                          #Empty spot adjacent case (recursive movement in direction)
+        place_piece(EMPTY, x, y, board);
         place_piece(piece_at_xy, adjacent[1], adjacent[2], board);
-        move(adjacent[1], adjacent[2], direction, board);
+        move(adjacent[1], adjacent[2], direction, board, merges);
         return True;
 
     elif piece_at_xy == adjacent[0]:                                    #Adjacent same numbers case (combine them)
-        place_piece('*', x, y, board);
-        place_piece(str(int(adjacent[0]) * 2), adjacent[1], adjacent[2], board);
-        move(adjacent[1], adjacent[2], direction, board);
+        place_piece(EMPTY, x, y, board);
+        place_piece(adjacent[0] + 1, adjacent[1], adjacent[2], board);
+        if merges is not None:
+            merges.append((adjacent[1], adjacent[2], get_piece(adjacent[1], adjacent[2], board)));
+        move(adjacent[1], adjacent[2], direction, board, merges);
         return True;
 
     else:
@@ -223,55 +702,114 @@ def move(x, y, direction, board):
 ################################## DO NOT CHANGE ANYTHING ABOVE THIS LINE ##################################
 ############################################################################################################
 
-def main():
-    clear();
-
-    board = make_board(4);
-    place_random(board);
-    print_board(board);
-
-    #Runs the game loop until the user quits or the game is lost
-    while True:
+def main(seed=None, animation=None, coalesce=False, show_moves=False):
+    #Arg seed: any number or string (optional) - the same seed always gives the same spawns
+    #Arg animation: string (optional) - one of ANIMATIONS, how the new piece after each swipe gets shown (DEFAULT_ANIMATION if not given)
+    #Arg coalesce: boolean (optional) - if True, every arrow key typed so far is played without drawing anything and only
+    #              the final board is drawn, so a burst of key presses costs one drawing instead of one per key
+    #Arg show_moves: boolean (optional) - with coalesce, also show how many swipes have been made under the board
+    if animation == None:
+        animation = DEFAULT_ANIMATION;
+    assert animation in ANIMATIONS, "Invalid animation passed in";
+    ANIMATION["mode"] = animation;
 
-        #Gets the key pressed and stores it in the key variable
-        key = get_key_press();
-
-        #Quit case ('q')
-        if key == 113:
-            break;
-
-        #Up arrow
-        if key == 65:
-            swipe_up(board);
-
-        #Down arrow
-        elif key == 66:
-            swipe_down(board);
-
-        #Right arrow
-        elif key == 67:
-            swipe_right(board);
-
-        #Left arrow
-        elif key == 68:
-            swipe_left(board);
-
-        #Space bar
-        elif key == 32:
-            swap(board);
-
-        #Special testing case: Runs test suite
-        elif key == 116:
-            clear();
-            tests();
+    clear();
+    start_keys();
 
-        #Check to see if I've lost at the end of the game or not
-        if have_lost(board):
-            print("You lost! Would you like to play again? (y/n)");
-            if (input() == 'y'):
-                main();
-            else:
-                break;
+    #However the game ends (q, losing, Ctrl-C, an error in autoplay...), the terminal is put back the way it was
+    try:
+        #Every game gets its own random number generator, so passing a seed replays the same spawns
+        rng = make_rng(seed);
+
+        board = make_board(4);
+        place_random(board, rng);
+        draw_board(board);
+
+        #Swipes made so far, and whether coalesced swipes have changed the board since it was last drawn
+        moves = 0;
+        undrawn = False;
+
+        #Runs the game loop until the user quits or the game is lost
+        playing = True;
+        while playing:
+
+            #Shows the new piece once its time comes (or straight away if a key is pressed first)
+            run_animation();
+
+            #Waits for key presses, then handles every key that has been typed so far in this one pass
+            read_keys();
+            while playing and len(KEY_QUEUE) > 0:
+                run_animation();
+                stamp, key = KEY_QUEUE.popleft();
+
+                #Quit case ('q')
+                if key == "q":
+                    playing = False;
+                    break;
+
+                swipe_key = key in ("up", "down", "right", "left");
+
+                #Anything but a coalesced swipe draws the board itself, so coalesced swipes have to be drawn first
+                if undrawn and not (coalesce and swipe_key):
+                    draw_board(board);
+                    undrawn = False;
+
+                #Coalesced arrow keys only change the board (it gets drawn once every key typed so far has been played)
+                if coalesce and swipe_key:
+                    if play_move(key, board, rng)[0]:
+                        moves += 1;
+                        undrawn = True;
+
+                #Arrow keys
+                elif key == "up":
+                    swipe_up(board, rng);
+
+                elif key == "down":
+                    swipe_down(board, rng);
+
+                elif key == "right":
+                    swipe_right(board, rng);
+
+                elif key == "left":
+                    swipe_left(board, rng);
+
+                #Space bar
+                elif key == " ":
+                    swap(board, rng);
+
+                #Autoplay ('a'): the AI plays until the game is lost
+                elif key == "a":
+                    autoplay(board, rng);
+
+                #Special testing case: Runs test suite
+                #(the tests read keys their own way and can quit the program, so the terminal is put back first)
+                elif key == "t":
+                    stop_keys();
+                    clear();
+                    tests();
+                    start_keys();
+
+                #Check to see if I've lost at the end of the game or not
+                if have_lost(board):
+                    if undrawn:
+                        draw_board(board);
+                        undrawn = False;
+                    run_animation();
+                    stop_keys();
+                    KEY_QUEUE.clear();
+                    print("You lost! Would you like to play again? (y/n)");
+                    if (input() == 'y'):
+                        main(animation=animation, coalesce=coalesce, show_moves=show_moves);
+                    playing = False;
+
+            #Coalesced swipes: draw only the board every key led to
+            if undrawn:
+                draw_board(board);
+                undrawn = False;
+                if show_moves:
+                    print("Moves: " + str(moves));
+    finally:
+        stop_keys();
 
     print("Game Finished!");
 
@@ -298,52 +836,98 @@ def place_piece(piece, x, y, board):
     if x >= N or y >= N or x < 0 or y < 0:
         return False;
 
+    #XOR the old piece out of the Zobrist hash and the new one in
+    if hasattr(board, "zobrist"):
+        board.zobrist ^= zobrist_key(y*N + x, board[y][x]) ^ zobrist_key(y*N + x, piece);
+
+    #Keep the empty space counts of boards made by make_board up to date
+    if hasattr(board, "empty_tree"):
+        change = (piece == EMPTY) - (board[y][x] == EMPTY);
+        if change != 0:
+            board.empty_count += change;
+            tree = board.empty_tree;
+            i = y*N + x + 1;
+            while i <= N * N:
+                tree[i] += change;
+                i += i & -i;
+
+    #Only the (up to) four pairs touching (x,y) can change, so uncount them, place the piece and count them again
+    if hasattr(board, "move_counts"):
+        track_pairs(x, y, board, -1);
+        board[y][x] = piece;
+        track_pairs(x, y, board, 1);
+        return True;
+
     board[y][x] = piece;
     return True;
 
-def place_random(board):
+def place_random(board, rng=random):
     #Helper function which is necessary for the game to continue playing
-    #Returns True if a piece is placed and False if the board is full
+    #Returns the (x, y, piece) that was placed (which counts as True) or False if the board is full
     #Places a 2 (60%) or 4 (37%) or 8 (3%) randomly on the board in an empty space
+    #Arg rng: random number generator (optional) - where the random numbers come from (exactly two are used per piece)
 
     #Checks if the board is full
     if board_full(board): return False;
 
-    #random.random() generates a random decimal between [0, 1) ... What does multiplying by 100 do?
-    generated = random.random() * 100;
+    #rng.random() generates a random decimal between [0, 1) ... What does multiplying by 100 do?
+    generated = rng.random() * 100;
 
     #Figure out which piece I should place, according to my generated random number
     if generated < 60:
-        to_place = "2";
+        to_place = 1;       #A 2
 
     elif generated < 97 and generated >= 60:
-        to_place = "4";
+        to_place = 2;       #A 4
 
     else:
-        to_place = "8";
-
+        to_place = 3;       #An 8
 
-    #Variable keeps track of whether a randomly generated empty spot has been found yet
-    found = False;
-    N = len(board);
-
-    while not found:
-        #Generate a random (x,y) coordinate that we can try to put our new value in at
-        random_y = int(random.random() * N);
-        random_x = int(random.random() * N);
+    #Pick one of the empty spaces with a single random number, counting them row by row from the top left, so the
+    #same board and number always give the same space (however the board got there, and in Large_Board.py too)
+    if hasattr(board, "empty_count"):
+        empty = board.empty_count;
+    else:
+        empty = sum(row.count(EMPTY) for row in board);
 
-        #Check that the randomly generated spot is empty and reassign found
-        found = get_piece(random_x, random_y, board) == '*';
+    random_x, random_y = find_empty(int(rng.random() * empty), board);
 
     #Place the piece
     place_piece(to_place, random_x, random_y, board);
 
-    return True;
+    return (random_x, random_y, to_place);
+
+def can_move(direction, board):
+    #Helper function that returns True if swiping the board in the given direction would change it and False otherwise
+    #Arg direction: string - "left", "right", "up", "down"
+    #Arg board: board - the board you want to check
+
+    #Boards made by make_board keep count of how many neighbouring pairs can move in each direction
+    if hasattr(board, "move_counts"):
+        return board.move_counts[direction] > 0;
+
+    N = len(board);
+    for y in range(N):
+        for x in range(N):
+            if x + 1 < N:
+                left, right = pair_moves(board[y][x], board[y][x+1]);
+                if (direction == "left" and left) or (direction == "right" and right): return True;
+            if y + 1 < N:
+                up, down = pair_moves(board[y][x], board[y+1][x]);
+                if (direction == "up" and up) or (direction == "down" and down): return True;
+
+    return False;
 
 def have_lost(board):
     #Helper function which checks at the end of each turn if the game has been lost
     #Returns True if the board is full and no possible turns exist and False otherwise
 
+    #Boards made by make_board can answer straight away: a full board with no pair that can move has lost
+    if hasattr(board, "move_counts"):
+        counts = board.move_counts;
+        return (board_full(board) and counts["left"] == 0 and counts["right"] == 0 and
+                counts["up"] == 0 and counts["down"] == 0);
+
     N = len(board);
 
     #Check every (x,y) position on the board to see if a move is possible
@@ -353,147 +937,285 @@ def have_lost(board):
 
     return True;
 
-def end_move(board):
-    #Prints the board after a swipe, pauses for .2 seconds, places a new random piece and prints the new state of the board
-    clear();
-    print_board(board);
+#How the new piece after a swipe is shown:
+#   "normal"   - the board is drawn after the swipe and again ANIMATION_DELAY seconds later with the new piece
+#                (a key pressed before then draws the new piece straight away and is handled right after)
+#   "compress" - like normal, but a swipe pressed before the new piece is shown skips that drawing altogether when it
+#                changes the board (fast players and bots only see the boards they have time to look at)
+#   "skip"     - only the board with the new piece is drawn, straight after the swipe
+ANIMATIONS = ("normal", "compress", "skip");
+DEFAULT_ANIMATION = "normal";
+ANIMATION_DELAY = .2;
+
+#The board waiting to be drawn by run_animation and the time.perf_counter() time it is due (None if nothing is waiting)
+ANIMATION = {"mode": DEFAULT_ANIMATION, "board": None, "due": None};
+
+def schedule_frame(board, delay):
+    #Helper function that asks run_animation to draw the board once the given number of seconds have passed
+    #(whatever the board holds at that time is drawn)
+    #Arg board: board - the board to draw
+    #Arg delay: float - seconds to wait
+
+    ANIMATION["board"] = board;
+    ANIMATION["due"] = time.perf_counter() + delay;
+
+def run_animation():
+    #Helper function that waits for the scheduled board to be due and draws it - unless a key is pressed first, in which
+    #case it is drawn straight away ("normal") or not at all ("compress") - so waiting never holds up a key press
+
+    if ANIMATION["due"] == None:
+        return;
+
+    #Keys already read into KEY_QUEUE count as pressed too
+    pressed = len(KEY_QUEUE) > 0 or key_ready(ANIMATION["due"] - time.perf_counter());
+
+    #"compress" only skips the drawing when the next key is a swipe that changes the board (and so draws it again) -
+    #any other key would leave the new piece off the screen
+    skip = False;
+    if pressed and ANIMATION["mode"] == "compress":
+        if len(KEY_QUEUE) == 0:
+            read_keys(0);
+        if len(KEY_QUEUE) > 0:
+            key = KEY_QUEUE[0][1];
+            skip = key in ("up", "down", "right", "left") and can_move(key, ANIMATION["board"]);
+
+    if not skip:
+        draw_board(ANIMATION["board"]);
+
+    ANIMATION["board"] = None;
+    ANIMATION["due"] = None;
+
+def end_move(board, rng=random):
+    #Draws the board after a swipe, places a new random piece and draws the new state of the board ANIMATION_DELAY
+    #seconds later (run_animation does that part, so new key presses are never kept waiting)
+    if ANIMATION["mode"] == "skip":
+        place_random(board, rng);
+        draw_board(board);
+        return;
+
+    draw_board(board);
+
+    place_random(board, rng);
+
+    schedule_frame(board, ANIMATION_DELAY);
+
+#The kernels slide can use: "recursive" calls move() for every piece (the original version),
+#"compact" runs compact_line once per row/column (same result, much faster on big boards)
+KERNELS = ("recursive", "compact");
+DEFAULT_KERNEL = "compact";
+
+def compact_line(x, y, dx, dy, board, merges):
+    #Headless engine function that slides one row or column of the board in place with a single loop
+    #The line starts at the edge (x,y) the pieces move towards and (dx,dy) is one step away from that edge
+    #Returns True if anything moved or combined and appends an (x, y, piece) tuple to merges for every combination
+    #Arg x: integer - x coordinate of the first space in the line
+    #Arg y: integer - y coordinate of the first space in the line
+    #Arg dx: integer - step in x between spaces in the line (-1, 0 or 1)
+    #Arg dy: integer - step in y between spaces in the line (-1, 0 or 1)
+    #Arg board: board - the board you wish to slide
+    #Arg merges: list - every combination made gets appended to this list
 
-    pause(.2);
+    N = len(board);
+    action_taken = False;
 
-    place_random(board);
+    #Spaces 0..top of the line hold the pieces that have already been slid (they behave like a stack)
+    top = -1;
+    for i in range(N):
+        piece = board[y + dy*i][x + dx*i];
+        if piece == EMPTY:
+            continue;
+
+        #Chain combinations: while the piece matches the last slid piece they combine and keep going
+        while top >= 0 and board[y + dy*top][x + dx*top] == piece:
+            piece += 1;
+            merges.append((x + dx*top, y + dy*top, piece));
+            place_piece(EMPTY, x + dx*top, y + dy*top, board);
+            top -= 1;
+
+        #The piece ends up just past the last slid piece (if that is where it already is, nothing happened)
+        top += 1;
+        if top != i:
+            action_taken = True;
+            place_piece(EMPTY, x + dx*i, y + dy*i, board);
+            place_piece(piece, x + dx*top, y + dy*top, board);
+
+    return action_taken;
+
+def slide(direction, board, kernel=DEFAULT_KERNEL):
+    #Headless engine function that slides every piece on the board in the given direction without printing or pausing
+    #Returns a (changed, merges) tuple - changed is True if any piece moved or combined and merges is a list of
+    #(x, y, piece) tuples, one for every combination made (both kernels give the same merges, but "compact" lists
+    #them row by row or column by column in the order the lines are slid)
+    #Arg direction: string - "left", "right", "up", "down"
+    #Arg board: board - the board you wish to slide
+    #Arg kernel: string (optional) - one of KERNELS, picks how each piece gets moved
 
-    clear();
-    print_board(board);
+    assert kernel in KERNELS, "Invalid kernel passed in";
 
-def swipe_left(board):
-    #Keeps track of whether swiping left actually did anything or not
-    #(should only update + add new piece if an action was actually taken)
+    #Keeps track of whether sliding actually did anything or not
+    #(the caller should only update + add new piece if an action was actually taken)
     action_taken = False;
+    merges = [];
 
     N = len(board);
 
-    #Iteration through board
-    for y in range(N):
-        for x in range(N):
-            #Get the adjacent pair of pieces
-            piece_at_xy = get_piece(x, y, board);
-            left_adjacent = get_piece(x-1, y, board);
+    if kernel == "compact":
+        for line in range(N):
+            if   direction == "left":   moved = compact_line(0, line, 1, 0, board, merges);
+            elif direction == "right":  moved = compact_line(N-1, line, -1, 0, board, merges);
+            elif direction == "up":     moved = compact_line(line, 0, 0, 1, board, merges);
+            elif direction == "down":   moved = compact_line(line, N-1, 0, -1, board, merges);
+            action_taken = moved or action_taken;
 
-            #I can't move an empty piece, so just move on if I'm looking at an empty piece at this (x,y) coordinate
-            if piece_at_xy == '*':
-                continue;
-
-            #I can't do anything if the left_adjacent piece is off the edge of the board either
-            if left_adjacent == None:
-                continue;
-
-            #Moves the piece left if I can (stops only when I hit the edge of the board (x = 0) or can't combine with the left piece)
-            #Note: due to limitations in skill level, this is a little different from the real 2048 (no chain combinations)
-            action_taken = move(x, y, "left", board) or action_taken;
-
-
-    if action_taken:
-        end_move(board);
-
-def swipe_right(board):
-    #Keeps track of whether swiping right actually did anything or not
-    #(should only update + add new piece if an action was actually taken)
-    action_taken = False;
-
-    N = len(board);
+        return (action_taken, merges);
 
     for y in range(N):
         for x in range(N):
-            #Don't worry about why this is done (is not needed for up or left)
-            x = N-1-x;
-
-            #Get the adjacent pair of pieces
-            piece_at_xy = get_piece(x, y, board);
-            right_adjacent = get_piece(x+1, y, board);
+            #Pieces closest to the edge we are sliding towards have to move first, so right and down walk backwards
+            if direction == "right":    x = N-1-x;
+            if direction == "down":     y_at = N-1-y;
+            else:                       y_at = y;
 
             #I can't move an empty piece, so just move on if I'm looking at an empty piece at this (x,y) coordinate
-            if piece_at_xy == '*':
+            if get_piece(x, y_at, board) == EMPTY:
                 continue;
 
-            #I can't do anything if the right_adjacent piece is off the edge of the board either
-            if right_adjacent == None:
-                continue;
+            #Moves the piece if I can (stops only when I hit the edge of the board or can't combine with the next piece)
+            #Note: due to limitations in skill level and the need for simplicity and elegance, this is a little different
+            #from the real 2048 (chain combinations are allowed)
+            action_taken = move(x, y_at, direction, board, merges) or action_taken;
 
-            #Moves the piece right if I can (stops only when I hit the edge of the board or can't combine with the right piece)
-            #Note: due to limitations in skill level, this is a little different from the real 2048 (chain combinations are allowed)
-            action_taken = move(x, y, "right", board) or action_taken;
+    return (action_taken, merges);
 
+def play_move(direction, board, rng=random):
+    #Headless engine function that plays one full turn: slides the board and, if anything changed, places a random piece
+    #Returns a (changed, merges, spawn) tuple - spawn is the (x, y, piece) placed by place_random or None if nothing was placed
+    #Arg direction: string - "left", "right", "up", "down"
+    #Arg board: board - the board you wish to play the turn on
+    #Arg rng: random number generator (optional) - passed on to place_random
 
-    if action_taken:
-        end_move(board);
+    changed, merges = slide(direction, board);
 
-def swipe_up(board):
-    #Keeps track of whether swiping up actually did anything or not
-    #(should only update + add new piece if an action was actually taken)
-    action_taken = False;
+    spawn = None;
+    if changed:
+        spawn = place_random(board, rng) or None;
 
-    N = len(board);
+    return (changed, merges, spawn);
 
-    for y in range(N):
-        for x in range(N):
-            #Get the adjacent pair of pieces
-            piece_at_xy = get_piece(x, y, board);
-            up_adjacent = get_piece(x, y-1, board);
-
-            #I can't move an empty piece, so just move on if I'm looking at an empty piece at this (x,y) coordinate
-            if piece_at_xy == '*':
-                continue;
+def slide_line(line):
+    #Headless engine function that returns a new list holding the given pieces slid towards index 0 (same rules as move())
+    #Arg line: list - a row or column of pieces, listed starting from the edge the pieces move towards
 
-            #I can't do anything if the up_adjacent piece is off the edge of the board either, so move on
-            if up_adjacent == None:
-                continue;
+    #Every piece travels until it hits another piece, and while that piece is the same, the two combine and the new
+    #piece keeps travelling (chain combinations) - so the pieces already slid behave like a stack
+    slid = [];
+    for piece in line:
+        if piece == EMPTY:
+            continue;
 
-            #Moves the piece up if I can (stops only when I hit the edge of the board or can't combine with the upper piece)
-            #Note: due to limitations in skill level, this is a little different from the real 2048 (chain combinations are allowed)
-            action_taken = move(x, y, "up", board) or action_taken;
+        while len(slid) > 0 and slid[-1] == piece:
+            slid.pop();
+            piece += 1;
 
+        slid.append(piece);
 
-    if action_taken:
-        end_move(board);
+    return slid + [EMPTY] * (len(line) - len(slid));
 
-def swipe_down(board):
-    #Keeps track of whether swiping right actually did anything or not
-    #(should only update + add new piece if an action was actually taken)
-    action_taken = False;
+def preview_moves(board):
+    #Headless engine function that works out what every swipe would do without changing the board, spawning or printing
+    #Returns a (legal, successors) tuple - legal is the set of directions that would change the board and successors
+    #is a dictionary from each legal direction to the new board (a plain list of rows) that swipe would produce
+    #Arg board: board - the board you want to preview
 
     N = len(board);
+    legal = set();
+    for direction in ("left", "right", "up", "down"):
+        if can_move(direction, board):
+            legal.add(direction);
+
+    successors = {};
+    for direction in legal:
+        successors[direction] = [[None] * N for y in range(N)];
 
+    #One walk over the rows covers left and right, one walk over the columns covers up and down
     for y in range(N):
-        #Don't worry about why this is done (is not needed for up or left)
-        y = N-1-y;
+        row = board[y];
+        if "left" in legal:
+            successors["left"][y] = slide_line(row);
+        if "right" in legal:
+            successors["right"][y] = slide_line(row[::-1])[::-1];
+
+    if "up" in legal or "down" in legal:
         for x in range(N):
-            #Get the adjacent pair of pieces
-            piece_at_xy = get_piece(x, y, board);
-            down_adjacent = get_piece(x, y+1, board);
+            column = [board[y][x] for y in range(N)];
+            if "up" in legal:
+                slid = slide_line(column);
+                for y in range(N):  successors["up"][y][x] = slid[y];
+            if "down" in legal:
+                slid = slide_line(column[::-1]);
+                for y in range(N):  successors["down"][N-1-y][x] = slid[y];
+
+    return (legal, successors);
+
+#Longest the AI may think about a single autoplay move (in seconds) and the deepest it may search in that time
+AUTOPLAY_TIME_LIMIT = .02;
+AUTOPLAY_MAX_DEPTH = 6;
+
+def autoplay(board, rng=random):
+    #Lets the expectimax AI pick every swipe until no moves remain, printing its search speed after each move and the
+    #move time percentiles and depths it reached at the end
+    #Arg board: board - a 4 x 4 board made by make_board
+    #Arg rng: random number generator (optional) - passed on to the swipe functions
+
+    #Imported here because the AI itself is built on top of this file
+    import Expectimax;
+
+    search = Expectimax.make_search(depth=AUTOPLAY_MAX_DEPTH, time_limit=AUTOPLAY_TIME_LIMIT);
+    swipes = {"left": swipe_left, "right": swipe_right, "up": swipe_up, "down": swipe_down};
+
+    while not have_lost(board):
+        direction = Expectimax.choose_move(board, search);
+        if direction == None:
+            break;
 
-            #I can't move an empty piece, so just move on if I'm looking at an empty piece at this (x,y) coordinate
-            if piece_at_xy == '*':
-                continue;
+        swipes[direction](board, rng);
 
-            #I can't do anything if the right_adjacent piece is off the edge of the board either
-            if down_adjacent == None:
-                continue;
+        #The AI moves faster than the animation, so a new piece is only drawn if its time has already come - waiting
+        #for it would hold every move up by ANIMATION_DELAY, and the next swipe draws the board (new piece included) anyway
+        if ANIMATION["due"] != None and time.perf_counter() >= ANIMATION["due"]:
+            run_animation();
+        print(Expectimax.search_report(search));
 
-            #Moves the piece down if I can (stops only when I hit the edge of the board or can't combine with the lower piece)
-            #Note: due to limitations in skill level and the need for simplicity and elegance, this is a little different
-            #from the real 2048 (chain combinations are allowed)
-            action_taken = move(x, y, "down", board) or action_taken;
+    #The last new piece still has to be shown
+    run_animation();
+    print(Expectimax.latency_report(search));
+
+def swipe_left(board, rng=random):
+    #Simulates a left swipe on the board, then prints it and adds a new piece if an action was actually taken
+    if slide("left", board)[0]:
+        end_move(board, rng);
 
+def swipe_right(board, rng=random):
+    #Simulates a right swipe on the board, then prints it and adds a new piece if an action was actually taken
+    if slide("right", board)[0]:
+        end_move(board, rng);
 
-    if action_taken:
-        end_move(board);
+def swipe_up(board, rng=random):
+    #Simulates an upward swipe on the board, then prints it and adds a new piece if an action was actually taken
+    if slide("up", board)[0]:
+        end_move(board, rng);
+
+def swipe_down(board, rng=random):
+    #Simulates a downward swipe on the board, then prints it and adds a new piece if an action was actually taken
+    if slide("down", board)[0]:
+        end_move(board, rng);
 
 
 ############################################################################################################
 ######################## EXTRA FOR EXPERTS -- ATTEMPT AFTER FINISHING PROJECT ##############################
 ############################################################################################################
 
-def swap(board):
+def swap(board, rng=random):
     #Extra for Experts: an addition to our game that adds some randomness and chance!
     #Randomly swaps 2 different numbers on the board (only have one swap per game!)
     #Purpose: allows you to evade losing for a little while longer if the swap is useful
@@ -512,22 +1234,22 @@ def swap(board):
     #Getting the first random piece to swap
     found = False;
     while not found:
-        random_x1 = int(random.random() * N);
-        random_y1 = int(random.random() * N);
+        random_x1 = int(rng.random() * N);
+        random_y1 = int(rng.random() * N);
 
         first_random_piece = get_piece(random_x1, random_y1, board);
 
-        found = first_random_piece != '*';
+        found = first_random_piece != EMPTY;
 
     #Getting the second random piece to swap
     found = False;
     while not found:
-        random_x2 = int(random.random() * N);
-        random_y2 = int(random.random() * N);
+        random_x2 = int(rng.random() * N);
+        random_y2 = int(rng.random() * N);
 
         second_random_piece = get_piece(random_x2, random_y2, board);
 
-        found = second_random_piece != '*' and second_random_piece != first_random_piece;
+        found = second_random_piece != EMPTY and second_random_piece != first_random_piece;
 
 
     #Swap the first and second pieces
@@ -552,7 +1274,7 @@ def swap_possible(board):
             piece_at_xy = get_piece(x, y, board);
 
             #Don't add empty spaces (they obviously can't be swapped...)
-            if piece_at_xy != '*':  container.add(piece_at_xy);
+            if piece_at_xy != EMPTY:  container.add(piece_at_xy);
 
     unique_pieces = len(container);
 
@@ -607,25 +1329,25 @@ def tests():
                          );
                 assert result, "Not returning None properly during an invalid get or misunderstanding of spec w/ invalid inputs";
 
-                result = (False == place_piece('*', -1, -1, board)  ==
-                                   place_piece('*', N, N, board)
+                result = (False == place_piece(EMPTY, -1, -1, board)  ==
+                                   place_piece(EMPTY, N, N, board)
                          );
                 assert result, "Not returning False properly during an invalid place or misunderstanding of spec w/ invalid inputs";
 
 
                 #Tests that getting what was placed is possible
-                to_place = '0';
+                to_place = 1;
                 for y in range(N):
                     for x in range(N):
                         place_piece(to_place, x, y, board);
                         assert to_place == get_piece(x, y, board), ("Placed a piece at ", x, ", ", y, " but did not get same piece back");
-                        to_place = chr(ord(to_place) + 1);
+                        to_place = to_place + 1;
 
                 assert board_full(board), "N by N Board needs to be full after N*N calls to place_piece";
 
                 #Checks against data abstraction violations
                 temp_board = make_board(10);
-                assert place_piece('7', 7, 7, temp_board) != False, "Data abstraction violation. Hard-coded bounds in place_piece";
+                assert place_piece(7, 7, 7, temp_board) != False, "Data abstraction violation. Hard-coded bounds in place_piece";
                 assert get_piece(7, 7, temp_board) != None, "Data abstraction violation. Hard-coded bounds in get_piece";
 
 
@@ -655,10 +1377,10 @@ def tests():
             empty, two, four, eight = 0, 0, 0, 0;
             for row in board:
                 for piece in row:
-                    if piece == '*':    empty += 1;
-                    elif piece == '2':  two += 1;
-                    elif piece == '4':  four += 1;
-                    elif piece == '8':  eight += 1;
+                    if piece == EMPTY:  empty += 1;
+                    elif piece == 1:    two += 1;
+                    elif piece == 2:    four += 1;
+                    elif piece == 3:    eight += 1;
                     else:
                         print("Incorrect piece found: ", piece);
                         print("Examine to_place and place piece more carefully... Quitting now");
@@ -684,22 +1406,22 @@ def tests():
         #Test case: have_lost ('3')
         elif key == 51:
             assert not have_lost(board), "An empty board should not lose";
-            place_piece('0', 0, 0, board);
+            place_piece(1, 0, 0, board);
             assert not have_lost(board), "A board with 1 piece should not lose";
 
 
             board = make_board(2);
-            place_piece('0', 0, 0, board);
-            place_piece('0', 1, 0, board);
-            place_piece('0', 0, 1, board);
-            place_piece('0', 1, 1, board);
+            place_piece(1, 0, 0, board);
+            place_piece(1, 1, 0, board);
+            place_piece(1, 0, 1, board);
+            place_piece(1, 1, 1, board);
             assert not have_lost(board), "A full board but with possible moves should not lose";
 
             board = make_board(2);
-            place_piece('1', 0, 0, board);
-            place_piece('0', 1, 0, board);
-            place_piece('0', 0, 1, board);
-            place_piece('1', 1, 1, board);
+            place_piece(2, 0, 0, board);
+            place_piece(1, 1, 0, board);
+            place_piece(1, 0, 1, board);
+            place_piece(2, 1, 1, board);
             assert have_lost(board), "A full board with no possible moves should lose";
 
             print("Test passed.");
@@ -713,18 +1435,22 @@ def tests():
             print("If this msg does not get cleared, test failed. Ensure you always clear the screen before printing a board");
             pause(3.5);
             end_move(board);
+            run_animation();
 
             print("There should only be one board on the screen with 1 total piece at a random position");
             pause(3.5);
 
             end_move(board);
+            run_animation();
             print("There should only be one board on the screen with 2 total pieces at random positions");
             print("If two boards are on the screen, ensure you always clear the screen before printing a board");
             pause(4);
 
 
+            #end_move only schedules the new piece's drawing, so run_animation is timed with it
             now = time.time();
             end_move(board);
+            run_animation();
             after = time.time();
 
             assert after - now > .2, ("Not pausing correctly in end_move -- review instructions carefully -- execution took " + str(after - now) + " seconds");
@@ -736,4 +1462,13 @@ def tests():
             board = make_board(N);      #Clears the board
 
 
-main();
+#Only start the game when run directly, so the headless engine can be imported by bots and tools
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Play 2048 in the terminal");
+    parser.add_argument("--seed", default=None, help="seed for the spawns (the same seed replays the same game)");
+    parser.add_argument("--animation", choices=ANIMATIONS, default=DEFAULT_ANIMATION, help="how new pieces are shown");
+    parser.add_argument("--coalesce", action="store_true", help="play every key typed so far, then draw only the final board");
+    parser.add_argument("--show-moves", action="store_true", help="with --coalesce, show the number of swipes made");
+    options = parser.parse_args();
+
+    main(options.seed, options.animation, options.coalesce, options.show_moves);
@@ -0,0 +1,303 @@
+"""
+Project: "2048 in Python!" - Move suggestion service
+
+An asyncio server that suggests swipes for many games at once. Clients connect over a local TCP socket and send one
+JSON request per line, and get one JSON answer per line back:
+
+    {"id": 7, "board": [[0, 1, 0, 0], [0, 0, 2, 0], [0, 0, 0, 0], [1, 0, 0, 0]]}   ->   {"id": 7, "direction": "left"}
+    {"id": 8, "board": "0000000000200010"}                                         ->   {"id": 8, "direction": "up"}
+    {"metrics": true}                                                              ->   {"queue_depth": 0, ...}
+
+A board is either the rows of a 4 x 4 board from make_board (pieces as stored: 0 is empty, 1 is a 2, 2 is a 4...) or
+the compact encoding: its bitboard (Bitboard.py) as a hexadecimal string or an integer. "direction" is null when no
+swipe changes the board, and a bad request gets {"id": ..., "error": "..."} instead. Answers come back as soon as they
+are ready, so they can be out of order when a client sends several requests without waiting - use "id" to match them.
+
+Requests are put in a queue. One task takes everything waiting in the queue as a batch and hands it to a pool of
+worker processes that run the expectimax search (Expectimax.py), so the event loop itself never searches. At most
+one batch per worker is running at once. While they are all busy, new requests wait in the queue and go out
+together in the next batch.
+
+To Run: python3 Suggestion_Service.py --port 2048
+
+Abstraction Reference Guide:
+
+    decode_board    - turns a board in either request format into a bitboard
+    make_service    - creates the service settings, worker pool and counters
+    suggest         - (async) queues a bitboard and returns the direction suggested for it
+    metrics         - returns a dictionary with the queue depth, batches in flight, request counts and latency percentiles
+    serve           - (async) starts the batching task and the TCP server and runs until cancelled
+    close_service   - shuts down the service's worker pool
+    request_moves   - simple blocking client: sends boards to a running service and returns the directions in order
+    main            - reads the command line and runs the service
+
+"""
+
+import argparse
+import asyncio
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+import json
+import os
+import socket
+import time
+
+from Bitboard import to_bitboard
+import Expectimax
+
+
+def decode_board(value):
+    #Returns the bitboard for a board sent in a request, raising ValueError if it isn't a valid board
+    #(requests come from the network, so they are checked with real errors rather than asserts)
+    #Arg value: list, string or integer - rows of a 4 x 4 board, or a bitboard as a hexadecimal string or an integer
+
+    if isinstance(value, list):
+        if len(value) != 4 or not all(isinstance(row, list) and len(row) == 4 for row in value):
+            raise ValueError("A board must be 4 rows of 4 pieces");
+        if not all(type(piece) == int and 0 <= piece <= 15 for row in value for piece in row):
+            raise ValueError("Pieces must be integers from 0 to 15");
+        return to_bitboard(value);
+
+    if isinstance(value, str):
+        value = int(value, 16);
+
+    if type(value) != int or not 0 <= value < 2**64:
+        raise ValueError("A compact board must be a 64-bit bitboard");
+    return value;
+
+
+#Every worker process keeps one search (and its transposition table) for all the boards it is handed
+WORKER_SEARCH = {};
+
+def _start_worker(depth, time_limit):
+    WORKER_SEARCH["search"] = Expectimax.make_search(depth=depth, time_limit=time_limit);
+
+
+def _suggest_batch(bitboards):
+    #Runs in a worker process: returns the direction the search picks for every bitboard in the batch
+    search = WORKER_SEARCH["search"];
+    return [Expectimax.best_move(bitboard, search)[0] for bitboard in bitboards];
+
+
+def make_service(workers=None, batch_size=64, depth=2, time_limit=None):
+    #Returns a dictionary holding the service's settings, worker pool and counters
+    #Arg workers: integer (optional) - worker processes (one per core if not given)
+    #Arg batch_size: integer - most requests handed to a worker at a time
+    #Arg depth: integer - how deep the search goes (the deepest it may go if there is a time_limit)
+    #Arg time_limit: float (optional) - seconds the search may spend on each board (see Expectimax.make_search)
+
+    if workers == None:
+        workers = os.cpu_count() or 1;
+
+    return {
+        "workers": workers,
+        "batch_size": batch_size,
+        "pool": ProcessPoolExecutor(workers, initializer=_start_worker, initargs=(depth, time_limit)),
+        "queue": None,
+        "in_flight": 0,
+        "requests": 0,
+        "errors": 0,
+        "batches": 0,
+        "batched": 0,
+        "latencies": deque(maxlen=10000)
+    };
+
+
+async def suggest(service, bitboard):
+    #Queues the bitboard and returns the direction suggested for it (None if no swipe changes the board)
+    #Arg service: dictionary - made by make_service (and started by serve)
+    #Arg bitboard: integer - the position to search
+
+    start = time.perf_counter();
+    answer = asyncio.get_running_loop().create_future();
+    service["queue"].put_nowait((bitboard, answer));
+
+    direction = await answer;
+    service["requests"] += 1;
+    service["latencies"].append(time.perf_counter() - start);
+    return direction;
+
+
+async def _run_batch(service, batch, done):
+    #Searches one batch in the worker pool and hands every request its answer
+    try:
+        loop = asyncio.get_running_loop();
+        directions = await loop.run_in_executor(service["pool"], _suggest_batch, [bitboard for bitboard, answer in batch]);
+        for (bitboard, answer), direction in zip(batch, directions):
+            if not answer.done():
+                answer.set_result(direction);
+    except Exception as error:
+        for bitboard, answer in batch:
+            if not answer.done():
+                answer.set_exception(error);
+    finally:
+        service["in_flight"] -= 1;
+        done.release();
+
+
+async def _batcher(service):
+    #Takes everything waiting in the queue (up to batch_size) as a batch, as long as a worker is free for it
+    queue = service["queue"];
+    free = asyncio.Semaphore(service["workers"]);
+    running = set();
+
+    while True:
+        batch = [await queue.get()];
+        await free.acquire();
+
+        #Anything that came in while waiting for a free worker goes out with this batch
+        while len(batch) < service["batch_size"] and not queue.empty():
+            batch.append(queue.get_nowait());
+
+        service["in_flight"] += 1;
+        service["batches"] += 1;
+        service["batched"] += len(batch);
+        task = asyncio.ensure_future(_run_batch(service, batch, free));
+        running.add(task);
+        task.add_done_callback(running.discard);
+
+
+def metrics(service):
+    #Returns a dictionary describing the service right now: requests waiting in the queue, batches running, requests
+    #answered, requests that got an error reply, average batch size and the 50th/90th/99th percentile and slowest
+    #latency in milliseconds (over the last 10000 requests)
+    #Arg service: dictionary - made by make_service
+
+    latencies = sorted(service["latencies"]);
+    percentiles = {};
+    if len(latencies) > 0:
+        for name, fraction in (("p50", .5), ("p90", .9), ("p99", .99)):
+            percentiles[name] = round(1000 * latencies[min(int(len(latencies) * fraction), len(latencies) - 1)], 3);
+        percentiles["max"] = round(1000 * latencies[-1], 3);
+
+    return {
+        "queue_depth": service["queue"].qsize() if service["queue"] != None else 0,
+        "in_flight": service["in_flight"],
+        "requests": service["requests"],
+        "errors": service["errors"],
+        "batches": service["batches"],
+        "average_batch": round(service["batched"] / max(service["batches"], 1), 2),
+        "latency_ms": percentiles
+    };
+
+
+async def _answer(service, line, writer):
+    #Works out the answer to one line sent by a client and writes it back
+    #Every request gets a reply - a bad request or a failed search (a crashed worker pool, ...) gets an error one
+    request = None;
+    try:
+        request = json.loads(line);
+        if not isinstance(request, dict):
+            raise ValueError("A request must be a JSON object");
+        if request.get("metrics"):
+            response = metrics(service);
+        else:
+            if "board" not in request:
+                raise ValueError("A request needs a board");
+            response = {"id": request.get("id"), "direction": await suggest(service, decode_board(request["board"]))};
+    except Exception as error:
+        service["errors"] += 1;
+        response = {"id": request.get("id") if isinstance(request, dict) else None, "error": str(error) or type(error).__name__};
+
+    writer.write((json.dumps(response) + "\n").encode());
+
+
+async def _handle_client(service, reader, writer):
+    #Reads requests from one client, answering each one as soon as it is ready (a client may send many without waiting)
+    answering = set();
+    try:
+        while True:
+            line = await reader.readline();
+            if not line:
+                break;
+            if not line.strip():
+                continue;
+
+            task = asyncio.ensure_future(_answer(service, line, writer));
+            answering.add(task);
+            task.add_done_callback(answering.discard);
+
+        if len(answering) > 0:
+            await asyncio.wait(answering);
+        await writer.drain();
+    except ConnectionError:
+        pass;
+    finally:
+        writer.close();
+
+
+async def serve(service, host="127.0.0.1", port=2048, on_ready=None):
+    #Starts the batching task and the TCP server, then answers clients until cancelled
+    #Arg service: dictionary - made by make_service
+    #Arg host: string - address to listen on (local only by default)
+    #Arg port: integer - port to listen on (0 picks a free one)
+    #Arg on_ready: function (optional) - called with the port once the server is listening
+
+    #The worker processes are started before listening: a worker forked later would inherit open client sockets
+    #and keep those connections from ever closing
+    await asyncio.get_running_loop().run_in_executor(service["pool"], _suggest_batch, []);
+
+    service["queue"] = asyncio.Queue();
+    batcher = asyncio.ensure_future(_batcher(service));
+
+    server = await asyncio.start_server(lambda reader, writer: _handle_client(service, reader, writer), host, port);
+    if on_ready != None:
+        on_ready(server.sockets[0].getsockname()[1]);
+
+    try:
+        async with server:
+            await server.serve_forever();
+    finally:
+        batcher.cancel();
+
+
+def close_service(service):
+    #Shuts down the service's worker pool (the service can't be used after this)
+    #Arg service: dictionary - made by make_service
+
+    service["pool"].shutdown(cancel_futures=True);
+
+
+def request_moves(boards, host="127.0.0.1", port=2048):
+    #Sends every board to a running service over one connection and returns the suggested directions in the same order
+    #Arg boards: list - boards in either request format (see decode_board)
+    #Arg host: string - address of the service
+    #Arg port: integer - port of the service
+
+    with socket.create_connection((host, port)) as connection:
+        lines = "".join(json.dumps({"id": i, "board": boards[i]}) + "\n" for i in range(len(boards)));
+        connection.sendall(lines.encode());
+        connection.shutdown(socket.SHUT_WR);
+
+        answers = {};
+        for line in connection.makefile("r"):
+            response = json.loads(line);
+            if "error" in response:
+                raise RuntimeError("The service could not answer board " + str(response["id"]) + ": " + response["error"]);
+            answers[response["id"]] = response["direction"];
+
+    return [answers[i] for i in range(len(boards))];
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Serves expectimax move suggestions for 4 x 4 2048 boards over TCP");
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on");
+    parser.add_argument("--port", type=int, default=2048, help="port to listen on");
+    parser.add_argument("--workers", type=int, default=None, help="search processes (default: one per core)");
+    parser.add_argument("--batch-size", type=int, default=64, help="most boards handed to a worker at once");
+    parser.add_argument("--depth", type=int, default=2, help="search depth (the deepest with --time-limit)");
+    parser.add_argument("--time-limit", type=float, default=None, help="seconds of search per board");
+    options = parser.parse_args();
+
+    service = make_service(options.workers, options.batch_size, options.depth, options.time_limit);
+    try:
+        asyncio.run(serve(service, options.host, options.port,
+                          lambda port: print("Suggesting moves on " + options.host + ":" + str(port))));
+    except KeyboardInterrupt:
+        pass;
+    finally:
+        close_service(service);
+
+
+if __name__ == "__main__":
+    main();
@@ -0,0 +1,131 @@
+"""
+Project: "2048 in Python!" - Symmetry-canonical board hashing
+
+A square board looks the same to the rules after being turned or flipped (8 ways in all), and a swipe on the turned
+board is just another swipe: swiping left and then flipping the board left-to-right is the same as flipping it and
+swiping right. So every position can be stored under one "canonical" key shared with its 7 mirror images, and a
+cache keyed on it holds up to 8 times more different positions in the same memory.
+
+A symmetry is a number from 0 to 7 made of three switches applied in this order:
+    4 - transpose (the piece at (x,y) moves to (y,x))
+    2 - flip left-to-right (x becomes N-1-x)
+    1 - flip top-to-bottom (y becomes N-1-y)
+So 0 leaves the board alone, 6 (transpose then flip left-to-right) turns it a quarter turn clockwise, and so on.
+
+Abstraction Reference Guide:
+
+    transform_board     - returns a board turned/flipped by the given symmetry as a tuple of row tuples
+    canonical_key       - returns (key, symmetry) - the smallest of the 8 transformed boards and the symmetry that gives it
+    transform_direction - returns the direction a swipe becomes on a board transformed by the given symmetry
+    restore_direction   - the opposite of transform_direction (turns a swipe picked on the canonical board back)
+    transform_bitboard  - transform_board for a 4 x 4 bitboard (Bitboard.py)
+    canonical_bitboard  - canonical_key for a 4 x 4 bitboard, returning (bitboard, symmetry)
+
+"""
+
+from Move_Tables import transpose
+
+SYMMETRIES = range(8);
+VECTORS = {"left": (-1, 0), "right": (1, 0), "up": (0, -1), "down": (0, 1)};
+
+
+def _move_point(x, y, N, symmetry):
+    #Returns where (x,y) ends up on an N x N board transformed by the given symmetry
+    if symmetry & 4:    x, y = y, x;
+    if symmetry & 2:    x = N-1-x;
+    if symmetry & 1:    y = N-1-y;
+    return (x, y);
+
+
+def transform_board(board, symmetry):
+    #Returns the board transformed by the given symmetry as a tuple of row tuples (which can be used as a dictionary key)
+    #Arg board: board - a board made by make_board (or any square list of rows)
+    #Arg symmetry: integer - 0 to 7
+
+    N = len(board);
+    new_board = [[None] * N for y in range(N)];
+    for y in range(N):
+        for x in range(N):
+            new_x, new_y = _move_point(x, y, N, symmetry);
+            new_board[new_y][new_x] = board[y][x];
+
+    return tuple(tuple(row) for row in new_board);
+
+
+def canonical_key(board):
+    #Returns a (key, symmetry) tuple - key is the same for a board and all 7 of its mirror images, and
+    #transform_board(board, symmetry) == key
+    #Arg board: board - a board made by make_board
+
+    best = None;
+    best_symmetry = 0;
+    for symmetry in SYMMETRIES:
+        key = transform_board(board, symmetry);
+        if best == None or key < best:
+            best = key;
+            best_symmetry = symmetry;
+
+    return (best, best_symmetry);
+
+
+def transform_direction(direction, symmetry):
+    #Returns the direction that swiping in the given direction becomes on a board transformed by the symmetry
+    #(swiping the board then transforming it gives the same result as transforming it then swiping the returned direction)
+    #Arg direction: string - "left", "right", "up", "down"
+    #Arg symmetry: integer - 0 to 7
+
+    dx, dy = VECTORS[direction];
+    if symmetry & 4:    dx, dy = dy, dx;
+    if symmetry & 2:    dx = -dx;
+    if symmetry & 1:    dy = -dy;
+
+    for name in VECTORS:
+        if VECTORS[name] == (dx, dy):
+            return name;
+
+
+def restore_direction(direction, symmetry):
+    #Returns the direction on the original board that matches swiping in the given direction on the transformed board
+    #Arg direction: string - "left", "right", "up", "down" (picked on the transformed board)
+    #Arg symmetry: integer - 0 to 7
+
+    for name in VECTORS:
+        if transform_direction(name, symmetry) == direction:
+            return name;
+
+
+def transform_bitboard(bitboard, symmetry):
+    #Returns the 4 x 4 bitboard transformed by the given symmetry
+    #Arg bitboard: integer - the bitboard to transform
+    #Arg symmetry: integer - 0 to 7
+
+    if symmetry & 4:
+        bitboard = transpose(bitboard);
+
+    #Left-to-right: swap the two nibbles in every byte, then the two bytes in every row
+    if symmetry & 2:
+        bitboard = ((bitboard & 0x0F0F0F0F0F0F0F0F) << 4) | ((bitboard >> 4) & 0x0F0F0F0F0F0F0F0F);
+        bitboard = ((bitboard & 0x00FF00FF00FF00FF) << 8) | ((bitboard >> 8) & 0x00FF00FF00FF00FF);
+
+    #Top-to-bottom: swap the rows in every half, then the two halves
+    if symmetry & 1:
+        bitboard = ((bitboard & 0x0000FFFF0000FFFF) << 16) | ((bitboard >> 16) & 0x0000FFFF0000FFFF);
+        bitboard = ((bitboard & 0xFFFFFFFF) << 32) | (bitboard >> 32);
+
+    return bitboard;
+
+
+def canonical_bitboard(bitboard):
+    #Returns a (canonical, symmetry) tuple - canonical is the same for a bitboard and all 7 of its mirror images, and
+    #transform_bitboard(bitboard, symmetry) == canonical
+    #Arg bitboard: integer - the bitboard to look at
+
+    best = bitboard;
+    best_symmetry = 0;
+    for symmetry in range(1, 8):
+        transformed = transform_bitboard(bitboard, symmetry);
+        if transformed < best:
+            best = transformed;
+            best_symmetry = symmetry;
+
+    return (best, best_symmetry);
@@ -0,0 +1,182 @@
+"""
+Project: "2048 in Python!" - Self-play tournament runner
+
+Plays many full games with the headless engine (play_move and place_random from Staff_Solution.py) in a pool of
+worker processes, one per core. Every finished game is streamed back and printed as it arrives, followed by the
+totals and the throughput in games/second and moves/second.
+
+To Run: python3 Tournament.py --games 10000 --strategy random --seed 1
+
+Game i of a tournament with seed S is always played with seed S + i, so any single game can be replayed.
+
+Abstraction Reference Guide:
+
+    STRATEGIES      - dictionary from a strategy's name to the function that picks its moves
+    random_strategy - picks a random legal swipe
+    corner_strategy - picks the first legal swipe from down, left, right, up (keeps big pieces in the bottom left corner)
+    expectimax_strategy - asks the expectimax AI (Expectimax.py, 4 x 4 boards only)
+    monte_carlo_strategy - asks the Monte Carlo rollout player (Monte_Carlo.py) with a small number of rollouts
+    play_game       - plays one full game and returns its result (score, max tile, move count, seed)
+    run_tournament  - plays many games in a process pool, calling a function with each result as it comes in
+    main            - reads the command line, runs the tournament and prints the results
+
+"""
+
+import argparse
+import multiprocessing
+import os
+import time
+
+from Staff_Solution import make_board, make_rng, place_random, play_move, can_move, have_lost
+
+DIRECTIONS = ("left", "right", "up", "down");
+
+
+def random_strategy(board, rng, state):
+    #Returns a random direction out of the ones that would change the board
+    legal = [direction for direction in DIRECTIONS if can_move(direction, board)];
+    return legal[int(rng.random() * len(legal))];
+
+
+def corner_strategy(board, rng, state):
+    #Returns the first direction out of down, left, right, up that would change the board
+    for direction in ("down", "left", "right", "up"):
+        if can_move(direction, board):
+            return direction;
+
+
+def expectimax_strategy(board, rng, state):
+    #Returns the direction the expectimax AI picks (the search and its transposition table are kept for the whole game)
+    import Expectimax;
+
+    if "search" not in state:
+        state["search"] = Expectimax.make_search();
+    return Expectimax.choose_move(board, state["search"]);
+
+
+def monte_carlo_strategy(board, rng, state):
+    #Returns the direction the Monte Carlo player picks
+    #(tournament games already run one per core, so the player's rollouts run inside this worker)
+    import Monte_Carlo;
+
+    if "player" not in state:
+        state["player"] = Monte_Carlo.make_player(rollouts=10, workers=0, seed=rng.random());
+    return Monte_Carlo.choose_move(board, state["player"]);
+
+
+STRATEGIES = {
+    "random": random_strategy,
+    "corner": corner_strategy,
+    "expectimax": expectimax_strategy,
+    "montecarlo": monte_carlo_strategy
+};
+
+
+def play_game(seed, strategy="random", size=4, max_moves=None):
+    #Plays one full game headlessly and returns its result as a dictionary
+    #(seed, score, max_tile, moves and seconds - score adds up the value of every piece made by combining)
+    #Arg seed: integer - seed for the game's random numbers (spawns and random choices)
+    #Arg strategy: string - name of the strategy in STRATEGIES that picks the moves
+    #Arg size: integer - board dimensions
+    #Arg max_moves: integer (optional) - stop the game after this many moves even if it isn't lost
+
+    start = time.perf_counter();
+    rng = make_rng(seed);
+    choose = STRATEGIES[strategy];
+    state = {};
+
+    board = make_board(size);
+    place_random(board, rng);
+
+    score = 0;
+    moves = 0;
+    while not have_lost(board) and (max_moves == None or moves < max_moves):
+        direction = choose(board, rng, state);
+        if direction == None:
+            break;
+
+        changed, merges, spawn = play_move(direction, board, rng);
+        for x, y, piece in merges:
+            score += 1 << piece;
+        moves += 1;
+
+    return {
+        "seed": seed,
+        "score": score,
+        "max_tile": 1 << max(max(row) for row in board),
+        "moves": moves,
+        "seconds": time.perf_counter() - start
+    };
+
+
+def _play(job):
+    #Worker process entry point (pool workers can only be handed one argument)
+    return play_game(*job);
+
+
+def run_tournament(games, strategy="random", size=4, seed=0, workers=None, max_moves=None, on_result=None):
+    #Plays the given number of games across a pool of worker processes and returns the totals as a dictionary
+    #(games, moves, score, best_score, best_tile, seconds, games_per_second and moves_per_second)
+    #Arg games: integer - number of games to play
+    #Arg strategy: string - name of the strategy in STRATEGIES
+    #Arg size: integer - board dimensions
+    #Arg seed: integer - game i is played with seed + i
+    #Arg workers: integer (optional) - number of worker processes (one per core if not given)
+    #Arg max_moves: integer (optional) - longest a single game is allowed to go
+    #Arg on_result: function (optional) - called with every game's result as soon as it finishes
+
+    assert strategy in STRATEGIES, "Unknown strategy";
+    if workers == None:
+        workers = os.cpu_count() or 1;
+
+    jobs = [(seed + i, strategy, size, max_moves) for i in range(games)];
+    totals = {"games": 0, "moves": 0, "score": 0, "best_score": 0, "best_tile": 0};
+
+    start = time.perf_counter();
+    with multiprocessing.Pool(workers) as pool:
+        #Small chunks keep results streaming back while still saving on the cost of handing out work
+        chunk = max(1, min(64, games // (workers * 8)));
+        for result in pool.imap_unordered(_play, jobs, chunk):
+            totals["games"] += 1;
+            totals["moves"] += result["moves"];
+            totals["score"] += result["score"];
+            totals["best_score"] = max(totals["best_score"], result["score"]);
+            totals["best_tile"] = max(totals["best_tile"], result["max_tile"]);
+            if on_result != None:
+                on_result(result);
+
+    seconds = max(time.perf_counter() - start, 1e-9);
+    totals["seconds"] = seconds;
+    totals["games_per_second"] = totals["games"] / seconds;
+    totals["moves_per_second"] = totals["moves"] / seconds;
+    return totals;
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Plays many headless games of 2048 in parallel");
+    parser.add_argument("--games", type=int, default=1000, help="number of games to play");
+    parser.add_argument("--strategy", choices=sorted(STRATEGIES), default="random", help="how moves are picked");
+    parser.add_argument("--size", type=int, default=4, help="board dimensions");
+    parser.add_argument("--seed", type=int, default=0, help="game i is played with seed + i");
+    parser.add_argument("--workers", type=int, default=None, help="worker processes (default: one per core)");
+    parser.add_argument("--max-moves", type=int, default=None, help="stop each game after this many moves");
+    parser.add_argument("--quiet", action="store_true", help="only print the totals");
+    options = parser.parse_args();
+
+    def show(result):
+        print("seed " + str(result["seed"]) + "\tscore " + str(result["score"]) + "\tmax tile " + str(result["max_tile"]) +
+              "\tmoves " + str(result["moves"]));
+
+    totals = run_tournament(options.games, options.strategy, options.size, options.seed, options.workers,
+                            options.max_moves, None if options.quiet else show);
+
+    print("");
+    print("Games: " + str(totals["games"]) + " -- Moves: " + str(totals["moves"]) +
+          " -- Average score: " + str(int(totals["score"] / max(totals["games"], 1))) +
+          " -- Best score: " + str(totals["best_score"]) + " -- Best tile: " + str(totals["best_tile"]));
+    print("Time: " + "%.2f" % totals["seconds"] + "s -- Games/second: " + "%.1f" % totals["games_per_second"] +
+          " -- Moves/second: " + "%.0f" % totals["moves_per_second"]);
+
+
+if __name__ == "__main__":
+    main();